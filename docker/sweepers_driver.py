@@ -60,12 +60,12 @@ import argparse
 import json
 import logging
 import os
-from datetime import datetime
+import time
 from typing import Callable
 
 from pds.registrysweepers import provenance, ancestry, repairkit, legacy_registry_sync
 from pds.registrysweepers.utils import configure_logging, parse_log_level
-from pds.registrysweepers.utils.db.client import get_opensearch_client_from_environment
+from pds.registrysweepers.utils.db.client import get_opensearch_client
 from pds.registrysweepers.utils.misc import get_human_readable_elapsed_since
 
 configure_logging(filepath=None, log_level=logging.INFO)
@@ -98,11 +98,15 @@ except Exception as err:
 
 log_level = parse_log_level(os.environ.get('LOGLEVEL', 'INFO'))
 
+# The environment is parsed once above - the resulting client is shared by all sweepers rather than re-reading and
+# re-parsing PROV_ENDPOINT/PROV_CREDENTIALS for each one
+client = get_opensearch_client(opensearch_endpoint, username, password, verify_certs=not dev_mode)
+
 
 def run_factory(sweeper_f: Callable) -> Callable:
     return functools.partial(
         sweeper_f,
-        client=get_opensearch_client_from_environment(verify_certs=True if not dev_mode else False),
+        client=client,
         log_filepath='registry-sweepers.log',
         log_level=log_level
     )
@@ -135,12 +139,12 @@ for option, sweeper in optional_sweepers.items():
 sweeper_descriptions = [inspect.getmodule(f).__name__ for f in sweepers]
 log.info(f'Running sweepers: {sweeper_descriptions}')
 
-total_execution_begin = datetime.now()
+total_execution_begin = time.monotonic()
 
 sweeper_execution_duration_strs = []
 
 for sweeper in sweepers:
-    sweeper_execution_begin = datetime.now()
+    sweeper_execution_begin = time.monotonic()
     run_sweeper_f = run_factory(sweeper)
 
     run_sweeper_f()
@@ -44,7 +44,9 @@ def run(
     log.info(f"Starting ancestry v{SWEEPERS_ANCESTRY_VERSION} sweeper processing...")
 
     bundle_records = get_bundle_ancestry_records(client, registry_mock_query_f)
-    collection_records = list(get_collection_ancestry_records(client, registry_mock_query_f))
+    # a re-iterable view over the collection records - it's consumed once by non-aggregate generation and once more when
+    # the collection records themselves are written, so there's no need to copy it into a list
+    collection_records = get_collection_ancestry_records(client, registry_mock_query_f)
     nonaggregate_records = get_nonaggregate_ancestry_records(client, collection_records, registry_mock_query_f)
 
     # the order of this chain is now important - writing descendants first ensures that if an ancestor is given a
@@ -112,7 +114,8 @@ def run(
 def generate_updates(
     ancestry_records: Iterable[AncestryRecord], ancestry_records_accumulator=None, bulk_updates_sink=None
 ) -> Iterable[Update]:
-    updates: Set[str] = set()
+    seen_doc_ids: Set[str] = set()
+    sweeper_version = int(SWEEPERS_ANCESTRY_VERSION)
 
     log.info("Generating document bulk updates for AncestryRecords...")
 
@@ -126,22 +129,22 @@ def generate_updates(
 
         doc_id = str(record.lidvid)
         update_content = {
-            METADATA_PARENT_BUNDLE_KEY: [str(id) for id in record.parent_bundle_lidvids],
-            METADATA_PARENT_COLLECTION_KEY: [str(id) for id in record.parent_collection_lidvids],
-            SWEEPERS_ANCESTRY_VERSION_METADATA_KEY: int(SWEEPERS_ANCESTRY_VERSION),
+            METADATA_PARENT_BUNDLE_KEY: sorted(map(str, record.parent_bundle_lidvids)),
+            METADATA_PARENT_COLLECTION_KEY: sorted(map(str, record.parent_collection_lidvids)),
+            SWEEPERS_ANCESTRY_VERSION_METADATA_KEY: sweeper_version,
         }
 
         # Tee the stream of bulk update KVs into the accumulator, if one was provided (functional testing).
         if bulk_updates_sink is not None:
             bulk_updates_sink.append((doc_id, update_content))
 
-        if doc_id in updates:
+        if doc_id in seen_doc_ids:
             log.error(
                 f"Multiple updates detected for doc_id {doc_id} - cannot create update! (new content {update_content} will not be written)"
             )
             continue
 
-        updates.add(doc_id)
+        seen_doc_ids.add(doc_id)
         yield Update(id=doc_id, content=update_content)
 
 
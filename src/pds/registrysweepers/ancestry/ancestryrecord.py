@@ -1,24 +1,48 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from dataclasses import field
 from typing import Callable
+from typing import Optional
 from typing import Set
 
 from pds.registrysweepers.ancestry.typedefs import SerializableAncestryRecordTypeDef
 from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
 
 
-@dataclass
 class AncestryRecord:
+    # One instance exists per non-aggregate product, so per-instance __dict__ overhead is avoided
+    __slots__ = ("lidvid", "parent_collection_lidvids", "parent_bundle_lidvids", "skip_write")
+
     lidvid: PdsLidVid
-    parent_collection_lidvids: Set[PdsLidVid] = field(default_factory=set)
-    parent_bundle_lidvids: Set[PdsLidVid] = field(default_factory=set)
+    parent_collection_lidvids: Set[PdsLidVid]
+    parent_bundle_lidvids: Set[PdsLidVid]
 
     # flag to track records which are used during processing, but should not be written to db, for example if an
     # equivalent record is known to already exist due to up-to-date ancestry version flag in the source document
-    skip_write: bool = False
+    skip_write: bool
+
+    def __init__(
+        self,
+        lidvid: PdsLidVid,
+        parent_collection_lidvids: Optional[Set[PdsLidVid]] = None,
+        parent_bundle_lidvids: Optional[Set[PdsLidVid]] = None,
+        skip_write: bool = False,
+    ):
+        self.lidvid = lidvid
+        self.parent_collection_lidvids = parent_collection_lidvids if parent_collection_lidvids is not None else set()
+        self.parent_bundle_lidvids = parent_bundle_lidvids if parent_bundle_lidvids is not None else set()
+        self.skip_write = skip_write
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        return (
+            self.lidvid == other.lidvid
+            and self.parent_collection_lidvids == other.parent_collection_lidvids
+            and self.parent_bundle_lidvids == other.parent_bundle_lidvids
+            and self.skip_write == other.skip_write
+        )
 
     def __repr__(self):
         return f"AncestryRecord(lidvid={self.lidvid}, parent_collection_lidvids={sorted([str(x) for x in self.parent_collection_lidvids])}, parent_bundle_lidvids={sorted([str(x) for x in self.parent_bundle_lidvids])})"
@@ -36,19 +60,25 @@ class AncestryRecord:
         }
 
     @staticmethod
-    def from_dict(d: SerializableAncestryRecordTypeDef, skip_write: bool = False) -> AncestryRecord:
+    def from_dict(
+        d: SerializableAncestryRecordTypeDef,
+        skip_write: bool = False,
+        parse_parent_lidvid: Callable[[str], PdsLidVid] = PdsLidVid.from_string,
+    ) -> AncestryRecord:
+        """
+        Parse an AncestryRecord from its dict representation.  Parent lidvids are shared by very many records, so callers
+        may supply a memoizing parse_parent_lidvid to parse each distinct parent only once.
+        """
         try:
             return AncestryRecord(
                 lidvid=PdsLidVid.from_string(d["lidvid"]),  # type: ignore
-                parent_collection_lidvids=set(
-                    PdsLidVid.from_string(lidvid) for lidvid in d["parent_collection_lidvids"]
-                ),
-                parent_bundle_lidvids=set(PdsLidVid.from_string(lidvid) for lidvid in d["parent_bundle_lidvids"]),
+                parent_collection_lidvids=set(map(parse_parent_lidvid, d["parent_collection_lidvids"])),
+                parent_bundle_lidvids=set(map(parse_parent_lidvid, d["parent_bundle_lidvids"])),
                 skip_write=skip_write,
             )
         except (KeyError, ValueError) as err:
             raise ValueError(
-                f'Could not parse valid AncestryRecord from provided dict due to "{err.__class__.__name__}: {err}" (got {json.dumps(d)})'
+                f'Could not parse valid AncestryRecord from provided dict due to "{err.__class__.__name__}: {err}" (got {json.dumps(d, default=list)})'
             )
 
     def update_with(self, other: AncestryRecord):
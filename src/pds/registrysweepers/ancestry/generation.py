@@ -1,15 +1,18 @@
+import functools
 import gc
 import logging
 import os
 import shutil
-import sys
 import tempfile
 from collections import namedtuple
+from typing import Collection
 from typing import Dict
+from typing import FrozenSet
 from typing import Iterable
 from typing import List
 from typing import Mapping
 from typing import Set
+from typing import Tuple
 from typing import Union
 
 import psutil  # type: ignore
@@ -23,7 +26,6 @@ from pds.registrysweepers.ancestry.queries import get_nonaggregate_ancestry_reco
 from pds.registrysweepers.ancestry.runtimeconstants import AncestryRuntimeConstants
 from pds.registrysweepers.ancestry.utils import dump_history_to_disk
 from pds.registrysweepers.ancestry.utils import load_partial_history_to_records
-from pds.registrysweepers.ancestry.utils import make_history_serializable
 from pds.registrysweepers.ancestry.utils import merge_matching_history_chunks
 from pds.registrysweepers.ancestry.versioning import SWEEPERS_ANCESTRY_VERSION
 from pds.registrysweepers.ancestry.versioning import SWEEPERS_ANCESTRY_VERSION_METADATA_KEY
@@ -33,6 +35,7 @@ from pds.registrysweepers.utils.misc import coerce_list_type
 from pds.registrysweepers.utils.productidentifiers.factory import PdsProductIdentifierFactory
 from pds.registrysweepers.utils.productidentifiers.pdslid import PdsLid
 from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
+from pds.registrysweepers.utils.productidentifiers.pdsproductidentifier import PdsProductIdentifier
 
 log = logging.getLogger(__name__)
 
@@ -42,6 +45,21 @@ log = logging.getLogger(__name__)
 # externally modified during sweeper execution will be marked as processed with the current sweeper version.
 RefDocBookkeepingEntry = namedtuple("RefDocBookkeepingEntry", ["id", "primary_term", "seq_no"])
 
+# Bundle and collection identifiers recur many times per run (e.g. a collection LIDVID appears in every registry-refs
+# page for that collection), so their parses are memoized.  Non-aggregate LIDVIDs are effectively unique and are not
+# routed through these caches, which keeps them bounded by the number of aggregate products.
+_parser_cache_maxsize = 0 if AncestryRuntimeConstants.disable_parser_cache else 2**17
+
+
+@functools.lru_cache(maxsize=_parser_cache_maxsize)
+def _parse_lidvid(lidvid_str: str) -> PdsLidVid:
+    return PdsLidVid.from_string(lidvid_str)
+
+
+@functools.lru_cache(maxsize=_parser_cache_maxsize)
+def _parse_identifier(identifier: str) -> PdsProductIdentifier:
+    return PdsProductIdentifierFactory.from_string(identifier)
+
 
 def get_bundle_ancestry_records(client: OpenSearch, db_mock: DbMockTypeDef = None) -> Iterable[AncestryRecord]:
     log.info("Generating AncestryRecords for bundles...")
@@ -50,7 +68,7 @@ def get_bundle_ancestry_records(client: OpenSearch, db_mock: DbMockTypeDef = Non
         try:
             sweeper_version_in_doc = doc["_source"].get(SWEEPERS_ANCESTRY_VERSION_METADATA_KEY, 0)
             skip_write = sweeper_version_in_doc >= SWEEPERS_ANCESTRY_VERSION
-            yield AncestryRecord(lidvid=PdsLidVid.from_string(doc["_source"]["lidvid"]), skip_write=skip_write)
+            yield AncestryRecord(lidvid=_parse_lidvid(doc["_source"]["lidvid"]), skip_write=skip_write)
         except (ValueError, KeyError) as err:
             log.warning(
                 'Failed to instantiate AncestryRecord from document in index "%s" with id "%s" due to %s: %s',
@@ -62,15 +80,27 @@ def get_bundle_ancestry_records(client: OpenSearch, db_mock: DbMockTypeDef = Non
             continue
 
 
-def get_ancestry_by_collection_lidvid(collections_docs: Iterable[Dict]) -> Mapping[PdsLidVid, AncestryRecord]:
-    # Instantiate the AncestryRecords, keyed by collection LIDVID for fast access
-
-    ancestry_by_collection_lidvid = {}
+def get_collection_ancestry_and_aliases(
+    collections_docs: Iterable[Dict],
+) -> Tuple[Dict[PdsLidVid, AncestryRecord], Dict[PdsLid, Set[PdsLid]]]:
+    """
+    In a single pass over the collections documents, instantiate the collection AncestryRecords (keyed by collection
+    LIDVID for fast access) and prepare the LID alias sets for every collection LID.
+    """
+    ancestry_by_collection_lidvid: Dict[PdsLidVid, AncestryRecord] = {}
+    aliases_by_lid: Dict[PdsLid, Set[PdsLid]] = {}
     for doc in collections_docs:
+        alternate_ids: List[str] = doc["_source"].get("alternate_ids", [])
+        lids: Set[PdsLid] = {_parse_identifier(id).lid for id in alternate_ids}
+        for lid in lids:
+            if lid not in aliases_by_lid:
+                aliases_by_lid[lid] = set()
+            aliases_by_lid[lid].update(lids)
+
         try:
             sweeper_version_in_doc = doc["_source"].get(SWEEPERS_ANCESTRY_VERSION_METADATA_KEY, 0)
             skip_write = sweeper_version_in_doc >= SWEEPERS_ANCESTRY_VERSION
-            lidvid = PdsLidVid.from_string(doc["_source"]["lidvid"])
+            lidvid = _parse_lidvid(doc["_source"]["lidvid"])
             ancestry_by_collection_lidvid[lidvid] = AncestryRecord(lidvid=lidvid, skip_write=skip_write)
         except (ValueError, KeyError) as err:
             log.warning(
@@ -82,20 +112,7 @@ def get_ancestry_by_collection_lidvid(collections_docs: Iterable[Dict]) -> Mappi
             )
             continue
 
-    return ancestry_by_collection_lidvid
-
-
-def get_collection_aliases_by_lid(collections_docs: Iterable[Dict]) -> Dict[PdsLid, Set[PdsLid]]:
-    aliases_by_lid: Dict[PdsLid, Set[PdsLid]] = {}
-    for doc in collections_docs:
-        alternate_ids: List[str] = doc["_source"].get("alternate_ids", [])
-        lids: Set[PdsLid] = {PdsProductIdentifierFactory.from_string(id).lid for id in alternate_ids}
-        for lid in lids:
-            if lid not in aliases_by_lid:
-                aliases_by_lid[lid] = set()
-            aliases_by_lid[lid].update(lids)
-
-    return aliases_by_lid
+    return ancestry_by_collection_lidvid, aliases_by_lid
 
 
 def get_ancestry_by_collection_lid(
@@ -112,32 +129,58 @@ def get_ancestry_by_collection_lid(
     return ancestry_by_collection_lid
 
 
+def get_aliased_ancestry_by_collection_lid(
+    collection_aliases_by_lid: Mapping[PdsLid, Set[PdsLid]],
+    ancestry_by_collection_lid: Mapping[PdsLid, Set[AncestryRecord]],
+) -> Mapping[PdsLid, List[AncestryRecord]]:
+    """
+    Resolve, once, the records of every collection LIDVID sharing a LID alias with each collection LID, so that a bundle
+    reference to a collection LID may be applied with a single lookup.  LIDs which resolve to no records are omitted.
+    """
+    aliased_ancestry_by_collection_lid: Dict[PdsLid, List[AncestryRecord]] = {}
+    for lid, aliases in collection_aliases_by_lid.items():
+        records = [record for alias in aliases for record in ancestry_by_collection_lid.get(alias, ())]
+        if len(records) > 0:
+            aliased_ancestry_by_collection_lid[lid] = records
+
+    return aliased_ancestry_by_collection_lid
+
+
 def get_collection_ancestry_records(
     client: OpenSearch, registry_db_mock: DbMockTypeDef = None
-) -> Iterable[AncestryRecord]:
+) -> Collection[AncestryRecord]:
     log.info("Generating AncestryRecords for collections...")
     bundles_docs = get_collection_ancestry_records_bundles_query(client, registry_db_mock)
-    collections_docs = list(get_collection_ancestry_records_collections_query(client, registry_db_mock))
-
-    # Prepare LID alias sets for every LID
-    collection_aliases_by_lid: Dict[PdsLid, Set[PdsLid]] = get_collection_aliases_by_lid(collections_docs)
+    collections_docs = get_collection_ancestry_records_collections_query(client, registry_db_mock)
 
-    # Prepare empty ancestry records for collections, with fast access by LID or LIDVID
-    ancestry_by_collection_lidvid: Mapping[PdsLidVid, AncestryRecord] = get_ancestry_by_collection_lidvid(
-        collections_docs
-    )
+    # Prepare empty ancestry records for collections, with fast access by LID or LIDVID, and LID alias sets for every LID
+    ancestry_by_collection_lidvid, collection_aliases_by_lid = get_collection_ancestry_and_aliases(collections_docs)
     ancestry_by_collection_lid: Mapping[PdsLid, Set[AncestryRecord]] = get_ancestry_by_collection_lid(
         ancestry_by_collection_lidvid
     )
+    aliased_ancestry_by_collection_lid = get_aliased_ancestry_by_collection_lid(
+        collection_aliases_by_lid, ancestry_by_collection_lid
+    )
 
     # For each bundle, add it to the bundle-ancestry of every collection it references
     for doc in bundles_docs:
         try:
-            bundle_lidvid = PdsLidVid.from_string(doc["_source"]["lidvid"])
-            referenced_collection_identifiers = [
-                PdsProductIdentifierFactory.from_string(id)
-                for id in coerce_list_type(doc["_source"]["ref_lid_collection"])
-            ]
+            bundle_lidvid = _parse_lidvid(doc["_source"]["lidvid"])
+
+            # Partition the referenced identifiers by type in a single pass
+            referenced_collection_lidvids: List[PdsLidVid] = []
+            referenced_collection_lids: List[PdsLid] = []
+            for id in coerce_list_type(doc["_source"]["ref_lid_collection"]):
+                identifier = _parse_identifier(id)
+                if isinstance(identifier, PdsLidVid):
+                    referenced_collection_lidvids.append(identifier)
+                elif isinstance(identifier, PdsLid):
+                    referenced_collection_lids.append(identifier)
+                else:
+                    raise RuntimeError(
+                        f"Encountered product identifier of unknown type {identifier.__class__} "
+                        f"(should be PdsLidVid or PdsLid)"
+                    )
         except (ValueError, KeyError) as err:
             log.warning(
                 'Failed to parse LIDVID and/or collection reference identifiers from document in index "%s" with id "%s" due to %s: %s',
@@ -148,36 +191,29 @@ def get_collection_ancestry_records(
             )
             continue
 
-        # For each identifier
-        #   - if a LIDVID is specified, add bundle to that LIDVID's record
-        #   - else if a LID is specified, add bundle to the record of every LIDVID with that LID
-        for identifier in referenced_collection_identifiers:
-            if isinstance(identifier, PdsLidVid):
-                try:
-                    ancestry_by_collection_lidvid[identifier].parent_bundle_lidvids.add(bundle_lidvid)
-                except KeyError:
-                    log.warning(
-                        f"Collection {identifier} referenced by bundle {bundle_lidvid} "
-                        f"does not exist in registry - skipping"
-                    )
-            elif isinstance(identifier, PdsLid):
-                try:
-                    for alias in collection_aliases_by_lid[identifier]:
-                        for record in ancestry_by_collection_lid[alias]:
-                            record.parent_bundle_lidvids.add(bundle_lidvid)
-                except KeyError:
-                    log.warning(
-                        f"No versions of collection {identifier} referenced by bundle {bundle_lidvid} "
-                        f"exist in registry - skipping"
-                    )
-            else:
-                raise RuntimeError(
-                    f"Encountered product identifier of unknown type {identifier.__class__} "
-                    f"(should be PdsLidVid or PdsLid)"
+        # If a LIDVID is specified, add bundle to that LIDVID's record
+        for lidvid in referenced_collection_lidvids:
+            try:
+                ancestry_by_collection_lidvid[lidvid].parent_bundle_lidvids.add(bundle_lidvid)
+            except KeyError:
+                log.warning(
+                    f"Collection {lidvid} referenced by bundle {bundle_lidvid} "
+                    f"does not exist in registry - skipping"
+                )
+
+        # If a LID is specified, add bundle to the record of every LIDVID with that LID (or an alias of it)
+        for lid in referenced_collection_lids:
+            try:
+                for record in aliased_ancestry_by_collection_lid[lid]:
+                    record.parent_bundle_lidvids.add(bundle_lidvid)
+            except KeyError:
+                log.warning(
+                    f"No versions of collection {lid} referenced by bundle {bundle_lidvid} "
+                    f"exist in registry - skipping"
                 )
 
-    # We could retain the keys for better performance, as they're used by the non-aggregate record generation, but this
-    # is cleaner, so we'll regenerate the dict from the records later unless performance is a problem.
+    # Return a view rather than a copy, as callers iterate over the records more than once.  The non-aggregate record
+    # generation regenerates its (cheap, O(collections)) lookup from these records rather than being coupled to this dict.
     return ancestry_by_collection_lidvid.values()
 
 
@@ -203,19 +239,31 @@ def _get_nonaggregate_ancestry_records_without_chunking(
     log.info("Generating AncestryRecords for non-aggregate products, using non-chunked input/output...")
 
     # Generate lookup for the parent bundles of all collections - these will be applied to non-aggregate products too.
-    bundle_ancestry_by_collection_lidvid = {
-        record.lidvid: record.parent_bundle_lidvids for record in collection_ancestry_records
+    # Frozen once per collection, as these are unioned into the ancestry of every product the collection contains.
+    bundle_ancestry_by_collection_lidvid: Dict[PdsLidVid, FrozenSet[PdsLidVid]] = {
+        record.lidvid: frozenset(record.parent_bundle_lidvids) for record in collection_ancestry_records
     }
 
-    collection_refs_query_docs = get_nonaggregate_ancestry_records_query(client, registry_db_mock)
+    collection_refs_query_docs = get_nonaggregate_ancestry_records_query(
+        client,
+        registry_db_mock,
+        collection_lidvid_strs={str(lidvid) for lidvid in bundle_ancestry_by_collection_lidvid},
+    )
 
-    nonaggregate_ancestry_records_by_lidvid = {}
+    # Records are keyed by LIDVID string, so that a product referenced by multiple collections (or batches) is only parsed
+    # the first time it is encountered, and every later reference resolves to the same record and PdsLidVid instance.
+    nonaggregate_ancestry_records_by_lidvid_str: Dict[str, AncestryRecord] = {}
     # For each collection, add the collection and its bundle ancestry to all products the collection contains
     for doc in collection_refs_query_docs:
         try:
-            collection_lidvid = PdsLidVid.from_string(doc["_source"]["collection_lidvid"])
+            collection_lidvid = _parse_lidvid(doc["_source"]["collection_lidvid"])
             bundle_ancestry = bundle_ancestry_by_collection_lidvid[collection_lidvid]
-            nonaggregate_lidvids = [PdsLidVid.from_string(s) for s in doc["_source"]["product_lidvid"]]
+            nonaggregate_lidvid_strs: List[str] = doc["_source"]["product_lidvid"]
+            unseen_nonaggregate_lidvids = {
+                s: PdsLidVid.from_string(s)
+                for s in nonaggregate_lidvid_strs
+                if s not in nonaggregate_ancestry_records_by_lidvid_str
+            }
         except (ValueError, KeyError) as err:
             log.warning(
                 'Failed to parse collection and/or product LIDVIDs from document in index "%s" with id "%s" due to %s: %s',
@@ -226,15 +274,15 @@ def _get_nonaggregate_ancestry_records_without_chunking(
             )
             continue
 
-        for lidvid in nonaggregate_lidvids:
-            if lidvid not in nonaggregate_ancestry_records_by_lidvid:
-                nonaggregate_ancestry_records_by_lidvid[lidvid] = AncestryRecord(lidvid=lidvid)
+        for lidvid_str, lidvid in unseen_nonaggregate_lidvids.items():
+            nonaggregate_ancestry_records_by_lidvid_str[lidvid_str] = AncestryRecord(lidvid=lidvid)
 
-            record = nonaggregate_ancestry_records_by_lidvid[lidvid]
+        for lidvid_str in nonaggregate_lidvid_strs:
+            record = nonaggregate_ancestry_records_by_lidvid_str[lidvid_str]
             record.parent_bundle_lidvids.update(bundle_ancestry)
             record.parent_collection_lidvids.add(collection_lidvid)
 
-    return nonaggregate_ancestry_records_by_lidvid.values()
+    return nonaggregate_ancestry_records_by_lidvid_str.values()
 
 
 def _get_nonaggregate_ancestry_records_with_chunking(
@@ -245,8 +293,11 @@ def _get_nonaggregate_ancestry_records_with_chunking(
     log.info("Generating AncestryRecords for non-aggregate products, using chunked input/output...")
 
     # Generate lookup for the parent bundles of all collections - these will be applied to non-aggregate products too.
-    bundle_ancestry_by_collection_lidvid = {
-        record.lidvid: record.parent_bundle_lidvids for record in collection_ancestry_records
+    # Records are accumulated in string form here, so the lookup is stringified (and frozen) once per collection rather
+    # than once per registry-refs document of that collection.
+    bundle_ancestry_strs_by_collection_lidvid_str: Dict[str, FrozenSet[str]] = {
+        str(record.lidvid): frozenset(str(id) for id in record.parent_bundle_lidvids)
+        for record in collection_ancestry_records
     }
 
     using_cache_override = bool(os.environ.get("TMP_OVERRIDE_DIR"))
@@ -257,7 +308,9 @@ def _get_nonaggregate_ancestry_records_with_chunking(
         on_disk_cache_dir = tempfile.mkdtemp(prefix="ancestry-merge-dump_")
     log.debug(f"dumping partial non-aggregate ancestry result-sets to {on_disk_cache_dir}")
 
-    collection_refs_query_docs = get_nonaggregate_ancestry_records_query(client, registry_db_mock)
+    collection_refs_query_docs = get_nonaggregate_ancestry_records_query(
+        client, registry_db_mock, collection_lidvid_strs=bundle_ancestry_strs_by_collection_lidvid_str.keys()
+    )
     touched_ref_documents: List[RefDocBookkeepingEntry] = []
 
     baseline_memory_usage = psutil.virtual_memory().percent
@@ -272,16 +325,19 @@ def _get_nonaggregate_ancestry_records_with_chunking(
     chunk_size_max = (
         0  # populated based on the largest encountered chunk.  see split_chunk_if_oversized() for explanation
     )
+    # polling system memory is a syscall, so it's done periodically rather than for every product reference
+    memory_usage_check_interval = 10000
+    references_since_memory_usage_check = 0
 
-    most_recent_attempted_collection_lidvid: Union[PdsLidVid, None] = None
+    most_recent_attempted_collection_lidvid_str: Union[str, None] = None
     nonaggregate_ancestry_records_by_lidvid = {}
     for doc in collection_refs_query_docs:
         try:
-            collection_lidvid = PdsLidVid.from_string(doc["_source"]["collection_lidvid"])
-            most_recent_attempted_collection_lidvid = collection_lidvid
+            collection_lidvid = _parse_lidvid(doc["_source"]["collection_lidvid"])
+            collection_lidvid_str = str(collection_lidvid)
+            most_recent_attempted_collection_lidvid_str = collection_lidvid_str
+            bundle_ancestry_strs = bundle_ancestry_strs_by_collection_lidvid_str[collection_lidvid_str]
             for nonaggregate_lidvid_str in doc["_source"]["product_lidvid"]:
-                bundle_ancestry = bundle_ancestry_by_collection_lidvid[collection_lidvid]
-
                 if nonaggregate_lidvid_str not in nonaggregate_ancestry_records_by_lidvid:
                     nonaggregate_ancestry_records_by_lidvid[nonaggregate_lidvid_str] = {
                         "lidvid": nonaggregate_lidvid_str,
@@ -290,18 +346,20 @@ def _get_nonaggregate_ancestry_records_with_chunking(
                     }
 
                 record_dict = nonaggregate_ancestry_records_by_lidvid[nonaggregate_lidvid_str]
-                record_dict["parent_bundle_lidvids"].update({str(id) for id in bundle_ancestry})
-                record_dict["parent_collection_lidvids"].add(str(collection_lidvid))
+                record_dict["parent_bundle_lidvids"].update(bundle_ancestry_strs)
+                record_dict["parent_collection_lidvids"].add(collection_lidvid_str)
+
+                references_since_memory_usage_check += 1
+                if references_since_memory_usage_check < memory_usage_check_interval:
+                    continue
+                references_since_memory_usage_check = 0
 
                 if psutil.virtual_memory().percent >= disk_dump_memory_threshold:
                     log.debug(
                         f"Memory threshold {disk_dump_memory_threshold:.1f}% reached - dumping serialized history to disk for {len(nonaggregate_ancestry_records_by_lidvid)} products"
                     )
-                    make_history_serializable(nonaggregate_ancestry_records_by_lidvid)
                     dump_history_to_disk(on_disk_cache_dir, nonaggregate_ancestry_records_by_lidvid)
-                    chunk_size_max = max(
-                        chunk_size_max, sys.getsizeof(nonaggregate_ancestry_records_by_lidvid)
-                    )  # slightly problematic due to reuse of pointers vs actual values, but let's try it
+                    chunk_size_max = max(chunk_size_max, len(nonaggregate_ancestry_records_by_lidvid))
                     nonaggregate_ancestry_records_by_lidvid = {}
 
             # mark collection for metadata update
@@ -312,7 +370,7 @@ def _get_nonaggregate_ancestry_records_with_chunking(
         except (ValueError, KeyError) as err:
             if (
                 isinstance(err, KeyError)
-                and most_recent_attempted_collection_lidvid not in bundle_ancestry_by_collection_lidvid
+                and most_recent_attempted_collection_lidvid_str not in bundle_ancestry_strs_by_collection_lidvid_str
             ):
                 probable_cause = f'[Probable Cause]: Collection primary document with id "{doc["_source"].get("collection_lidvid")}" not found in index "registry" for registry-refs doc with id "{doc.get("_id")}"'
             elif isinstance(err, ValueError):
@@ -323,12 +381,12 @@ def _get_nonaggregate_ancestry_records_with_chunking(
             log.warning(probable_cause)
             continue
 
-    # don't forget to yield non-disk-dumped records
-    make_history_serializable(nonaggregate_ancestry_records_by_lidvid)
-    chunk_size_max = max(chunk_size_max, sys.getsizeof(nonaggregate_ancestry_records_by_lidvid))
+    # don't forget to yield non-disk-dumped records.  These are parsed straight from their in-memory (set-valued) form, so
+    # there's no need to convert them to a serializable form first
+    chunk_size_max = max(chunk_size_max, len(nonaggregate_ancestry_records_by_lidvid))
     for history_dict in nonaggregate_ancestry_records_by_lidvid.values():
         try:
-            yield AncestryRecord.from_dict(history_dict)
+            yield AncestryRecord.from_dict(history_dict, parse_parent_lidvid=_parse_lidvid)
         except ValueError as err:
             log.warning(err)
     del nonaggregate_ancestry_records_by_lidvid
@@ -346,7 +404,7 @@ def _get_nonaggregate_ancestry_records_with_chunking(
         active_filepath = remaining_chunk_filepaths.pop()
         merge_matching_history_chunks(active_filepath, remaining_chunk_filepaths, max_chunk_size=chunk_size_max)
 
-        records_from_file = load_partial_history_to_records(active_filepath)
+        records_from_file = load_partial_history_to_records(active_filepath, parse_parent_lidvid=_parse_lidvid)
         for record in records_from_file:
             yield record
 
@@ -1,7 +1,8 @@
+import copy
 import logging
-from enum import auto
-from enum import Enum
+from enum import IntEnum
 from typing import Callable
+from typing import Collection
 from typing import Dict
 from typing import Iterable
 from typing import Optional
@@ -12,28 +13,36 @@ from pds.registrysweepers.ancestry.versioning import SWEEPERS_ANCESTRY_VERSION
 from pds.registrysweepers.ancestry.versioning import SWEEPERS_ANCESTRY_VERSION_METADATA_KEY
 from pds.registrysweepers.utils.db import get_query_hits_count
 from pds.registrysweepers.utils.db import query_registry_db_or_mock
+from pds.registrysweepers.utils.db import query_registry_db_with_sliced_scroll
 
 log = logging.getLogger(__name__)
 
 DbMockTypeDef = Optional[Callable[[str], Iterable[Dict]]]
 
 
-class ProductClass(Enum):
-    BUNDLE = (auto(),)
-    COLLECTION = (auto(),)
-    NON_AGGREGATE = auto()
+class ProductClass(IntEnum):
+    BUNDLE = 1
+    COLLECTION = 2
+    NON_AGGREGATE = 3
 
 
-def product_class_query_factory(cls: ProductClass) -> Dict:
-    queries: Dict[ProductClass, Dict] = {
-        ProductClass.BUNDLE: {"bool": {"filter": [{"term": {"product_class": "Product_Bundle"}}]}},
-        ProductClass.COLLECTION: {"bool": {"filter": [{"term": {"product_class": "Product_Collection"}}]}},
-        ProductClass.NON_AGGREGATE: {
-            "bool": {"must_not": [{"terms": {"product_class": ["Product_Bundle", "Product_Collection"]}}]}
-        },
-    }
+_product_class_queries: Dict[ProductClass, Dict] = {
+    ProductClass.BUNDLE: {"bool": {"filter": [{"term": {"product_class": "Product_Bundle"}}]}},
+    ProductClass.COLLECTION: {"bool": {"filter": [{"term": {"product_class": "Product_Collection"}}]}},
+    ProductClass.NON_AGGREGATE: {
+        "bool": {"must_not": [{"terms": {"product_class": ["Product_Bundle", "Product_Collection"]}}]}
+    },
+}
+
+
+# The collection filter is part of the query body, which is re-sent with every page request of the registry-refs scan,
+# so it is only applied while it stays small (~100B per LIDVID) relative to the page of product LIDVIDs it returns
+_max_collection_filter_terms = 1024
 
-    return {"query": queries[cls]}
+
+def product_class_query_factory(cls: ProductClass) -> Dict:
+    # the clauses are shared module-level templates, so each caller gets its own copy which it is free to extend/mutate
+    return {"query": copy.deepcopy(_product_class_queries[cls])}
 
 
 def get_bundle_ancestry_records_query(client: OpenSearch, db_mock: DbMockTypeDef = None) -> Iterable[Dict]:
@@ -66,7 +75,9 @@ def get_collection_ancestry_records_collections_query(
     return docs
 
 
-def get_nonaggregate_ancestry_records_query(client: OpenSearch, registry_db_mock: DbMockTypeDef) -> Iterable[Dict]:
+def get_nonaggregate_ancestry_records_query(
+    client: OpenSearch, registry_db_mock: DbMockTypeDef, collection_lidvid_strs: Optional[Collection[str]] = None
+) -> Iterable[Dict]:
     # Query the registry-refs index for the contents of all collections
     query: Dict = {
         "query": {
@@ -76,7 +87,32 @@ def get_nonaggregate_ancestry_records_query(client: OpenSearch, registry_db_mock
         },
         "seq_no_primary_term": True,
     }
+
+    # If the collections present in the registry are known, refs documents of absent collections (which cannot produce
+    # any ancestry) needn't be served at all.  Past the size cap, the unfiltered scan is used instead.
+    if collection_lidvid_strs is not None:
+        if len(collection_lidvid_strs) <= _max_collection_filter_terms:
+            query["query"]["bool"]["filter"] = [{"terms": {"collection_lidvid": sorted(collection_lidvid_strs)}}]
+        else:
+            log.info(
+                f"Registry contains {len(collection_lidvid_strs)} collections (more than {_max_collection_filter_terms}) - "
+                f"scanning registry-refs without a collection filter"
+            )
     _source = {"includes": ["collection_lidvid", "batch_id", "product_lidvid"]}
+
+    # registry-refs documents may be processed in any order, so the scan may be split into concurrently-paged slices
+    slices = AncestryRuntimeConstants.nonaggregate_ancestry_records_query_slices
+    if registry_db_mock is None and slices > 1:
+        return query_registry_db_with_sliced_scroll(
+            client,
+            "registry-refs",
+            query,
+            _source,
+            slices=slices,
+            page_size=AncestryRuntimeConstants.nonaggregate_ancestry_records_query_page_size,
+            request_timeout_seconds=30,
+        )
+
     query_f = query_registry_db_or_mock(registry_db_mock, "get_nonaggregate_ancestry_records", use_search_after=True)
 
     # each document will have many product lidvids, so a smaller page size is warranted here
@@ -11,11 +11,22 @@ class AncestryRuntimeConstants(ABC):
         os.environ.get("ANCESTRY_NONAGGREGATE_QUERY_PAGE_SIZE", 2000)
     )
 
+    # how many slices the registry-refs scan is split into, each paged concurrently by its own worker.  Values greater
+    # than 1 replace sequential search_after paging with a sliced scroll.  Increases load on the db - use with care.
+    nonaggregate_ancestry_records_query_slices: int = int(os.environ.get("ANCESTRY_NONAGGREGATE_QUERY_SLICES", 1))
+
     # non-aggregate history batches will be dumped to disk periodically as memory usage reaches this threshold
     max_acceptable_memory_usage: int = int(os.environ.get("ANCESTRY_DISK_DUMP_MEMORY_THRESHOLD", 80))
 
     # Expects a value like "true" or "1"
     disable_chunking: bool = parse_boolean_env_var("ANCESTRY_DISABLE_CHUNKING")
 
+    # Compresses on-disk history chunks with gzip, trading a little CPU for much less disk I/O during merges.  Expects a
+    # value like "true" or "1"
+    compress_disk_chunks: bool = parse_boolean_env_var("ANCESTRY_COMPRESS_DISK_CHUNKS")
+
+    # Disables memoization of bundle/collection identifier parsing.  Expects a value like "true" or "1"
+    disable_parser_cache: bool = parse_boolean_env_var("ANCESTRY_DISABLE_PARSER_CACHE")
+
     # Not yet implemented
     # db_write_timeout_seconds = int(os.environ.get('DB_WRITE_TIMEOUT_SECONDS'), 90)
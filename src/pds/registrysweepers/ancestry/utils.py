@@ -1,20 +1,44 @@
-import gc
-import json
+import gzip
+import io
 import logging
 import os
-import sys
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import Deque
 from typing import Dict
+from typing import FrozenSet
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Set
+from typing import Tuple
 from typing import Union
 
+import orjson
 from pds.registrysweepers.ancestry import AncestryRecord
+from pds.registrysweepers.ancestry.runtimeconstants import AncestryRuntimeConstants
 from pds.registrysweepers.ancestry.typedefs import SerializableAncestryRecordTypeDef
+from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
 
 log = logging.getLogger(__name__)
 
+_io_buffer_size = 2**16
+_gzip_compress_level = 1  # history records are highly repetitive, so the fastest level already compresses well
+
+
+def _open_history(fp: str, mode: str) -> BinaryIO:
+    """Open a history chunk file for binary reading/writing, (de)compressing it if so configured"""
+    if AncestryRuntimeConstants.compress_disk_chunks:
+        gzip_file = gzip.GzipFile(fp, mode, compresslevel=_gzip_compress_level)
+        # GzipFile only buffers reads, so buffer writes to avoid a compressor call per (short) record line
+        return io.BufferedWriter(gzip_file, _io_buffer_size) if "w" in mode else gzip_file  # type: ignore
+    return open(fp, mode, buffering=_io_buffer_size)  # type: ignore
+
 
 def make_history_serializable(history: Dict[str, Dict[str, Union[str, Set[str], List[str]]]]):
     """Convert history with set attributes into something able to be dumped to JSON"""
@@ -25,87 +49,136 @@ def make_history_serializable(history: Dict[str, Dict[str, Union[str, Set[str],
     log.debug("    complete!")
 
 
+def _encode_set(obj: Any) -> List:
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_history(fp: str, history: Dict):
+    # Each record is written as a single line, so that chunks may be streamed record-by-record.  Sets (as accumulated
+    # in-memory) are encoded directly as JSON arrays, so make_history_serializable() isn't needed
+    with _open_history(fp, "wb") as outfile:
+        for record in history.values():
+            outfile.write(orjson.dumps(record, default=_encode_set, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def _iterate_history(fp: str) -> Iterator[Tuple[bytes, SerializableAncestryRecordTypeDef]]:
+    """Yield the raw line and decoded record for each record in a history file"""
+    with _open_history(fp, "rb") as infile:
+        for line in infile:
+            yield line, orjson.loads(line)
+
+
+def _read_history(fp: str) -> Dict[str, SerializableAncestryRecordTypeDef]:
+    return {record["lidvid"]: record for _, record in _iterate_history(fp)}  # type: ignore
+
+
 def dump_history_to_disk(parent_dir: str, history: Dict[str, SerializableAncestryRecordTypeDef]) -> str:
     """Dump set of history records to disk and return the filepath"""
     temp_fp = os.path.join(parent_dir, datetime.now().isoformat().replace(":", "-"))
     log.debug(f"Dumping history to {temp_fp} for later merging...")
-    with open(temp_fp, "w+") as outfile:
-        json.dump(history, outfile)
+    _write_history(temp_fp, history)
     log.debug("    complete!")
 
     return temp_fp
 
 
+def _extract_matching_history(src_fp: str, lidvid_strs: FrozenSet[str]) -> List[SerializableAncestryRecordTypeDef]:
+    """
+    Stream a history file in a single pass, returning the records for any of the given lidvids and rewriting the file
+    without them.  Only the matching records are held in memory.
+    """
+    matching_history: List[SerializableAncestryRecordTypeDef] = []
+    remainder_fp = src_fp + ".remainder"
+    with _open_history(remainder_fp, "wb") as outfile:
+        for line, record in _iterate_history(src_fp):
+            if record["lidvid"] in lidvid_strs:
+                matching_history.append(record)
+            else:
+                outfile.write(line)
+
+    if len(matching_history) > 0:
+        # Overwrite the content of the source file with any remaining history not absorbed
+        os.replace(remainder_fp, src_fp)
+    else:
+        os.remove(remainder_fp)
+
+    return matching_history
+
+
 def merge_matching_history_chunks(dest_fp: str, src_fps: List[str], max_chunk_size: Union[int, None] = None):
     log.debug(f"Performing merges into {dest_fp} using max_chunk_size={max_chunk_size}")
-    with open(dest_fp, "r") as dest_infile:
-        dest_file_content: Dict[str, SerializableAncestryRecordTypeDef] = json.load(dest_infile)
+    dest_file_content = _read_history(dest_fp)
 
     dest_file_updated = False
 
-    for src_fn in src_fps:
-        log.debug(f"merging from {src_fn}...")
-        with open(src_fn, "r") as src_infile:
-            src_file_content: Dict[str, SerializableAncestryRecordTypeDef] = json.load(src_infile)
-
-        src_file_updated = False
-
-        # For every lidvid with history in the "active" file, absorb all relevant history from this inactive file
-        for lidvid_str, dest_history_entry in dest_file_content.items():
-            try:
-                src_history_to_merge = src_file_content[lidvid_str]
-                src_file_content.pop(lidvid_str)
-
-                # Flag files as updated - will trigger re-write to disk
-                dest_file_updated = True
-                src_file_updated = True
-
-                dest_history_entry = dest_file_content[lidvid_str]
-                for k in ["parent_bundle_lidvids", "parent_collection_lidvids"]:
-                    dest_history_entry[k].extend(src_history_to_merge[k])  # type: ignore
-
-            except KeyError:
-                # If the src history doesn't contain history for this lidvid, there's nothing to do
-                pass
-
-        if src_file_updated:
-            # Overwrite the content of the source file with any remaining history not absorbed
-            with open(src_fn, "w+") as src_outfile:
-                json.dump(src_file_content, src_outfile)
-
-        # this prevents a memory spike when reading in the next chunk of src_file_content
-        del src_file_content
-        gc.collect()
-
-        dest_parent_dir = os.path.split(dest_fp)[0]
-        split_filepath = split_chunk_if_oversized(max_chunk_size, dest_parent_dir, dest_file_content)
-        if split_filepath is not None:
-            # the path of the newly-created file with the split-off data is appended and will be processed next
-            # intuitively it seems like this is most-likely to create the fewest additional split-off files as it should
-            # avoid a bunch of unnecessary split-off files with overlapping content, but this is just a hunch which
-            # won't hurt anything to follow
-            src_fps.append(split_filepath)
-            dest_file_updated = True
+    # Merging never adds lidvids to the destination, so any split is performed up-front, before the set of lidvids to
+    # absorb is frozen
+    dest_parent_dir = os.path.split(dest_fp)[0]
+    merge_src_fps = list(src_fps)
+    split_filepath = split_chunk_if_oversized(max_chunk_size, dest_parent_dir, dest_file_content)
+    if split_filepath is not None:
+        # the path of the newly-created file with the split-off data is appended and will be processed next
+        # intuitively it seems like this is most-likely to create the fewest additional split-off files as it should
+        # avoid a bunch of unnecessary split-off files with overlapping content, but this is just a hunch which
+        # won't hurt anything to follow
+        src_fps.append(split_filepath)
+        dest_file_updated = True
+
+    if len(merge_src_fps) > 0:
+        # Source files are independent of one another, so they are streamed/rewritten concurrently (overlapping their
+        # disk I/O), while absorption into the destination content is performed serially on this thread.  Submission is
+        # throttled to the worker count, so that no more than max_workers extracted histories are held at once.
+        dest_lidvid_strs = frozenset(dest_file_content.keys())
+        max_workers = min(len(merge_src_fps), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="history-merge") as executor:
+            pending_extractions: Deque[Tuple[str, Future]] = deque()
+            for src_fp in merge_src_fps:
+                pending_extractions.append(
+                    (src_fp, executor.submit(_extract_matching_history, src_fp, dest_lidvid_strs))
+                )
+                if len(pending_extractions) >= max_workers:
+                    src_fn, extraction = pending_extractions.popleft()
+                    dest_file_updated |= _absorb_history(dest_file_content, src_fn, extraction.result())
+
+            while pending_extractions:
+                src_fn, extraction = pending_extractions.popleft()
+                dest_file_updated |= _absorb_history(dest_file_content, src_fn, extraction.result())
 
     if dest_file_updated:
         # Overwrite the content of the destination file with updated history including absorbed elements
-        with open(dest_fp, "w+") as src_outfile:
-            json.dump(dest_file_content, src_outfile)
+        _write_history(dest_fp, dest_file_content)
 
     log.debug("    complete!")
 
 
+def _absorb_history(
+    dest_content: Dict[str, SerializableAncestryRecordTypeDef],
+    src_fn: str,
+    matching_history: List[SerializableAncestryRecordTypeDef],
+) -> bool:
+    """Merge extracted history into the destination content, returning whether the destination was modified"""
+    log.debug(f"merging {len(matching_history)} records from {src_fn}...")
+    for src_history_to_merge in matching_history:
+        dest_history_entry = dest_content[src_history_to_merge["lidvid"]]  # type: ignore
+        for k in ["parent_bundle_lidvids", "parent_collection_lidvids"]:
+            dest_history_entry[k].extend(src_history_to_merge[k])  # type: ignore
+
+    return len(matching_history) > 0
+
+
 def split_chunk_if_oversized(max_chunk_size: Union[int, None], parent_dir: str, content: Dict) -> Union[str, None]:
     """
     To keep memory usage near expected bounds, it's necessary to avoid accumulation into a merge destination chunk such
     that its size balloons beyond the size of a pre-merge chunk.  This is achieved by splitting the chunk approximately
-    in half, if its size exceeds the given threshold, and returning the newly-created chunk's filepath for addition to
-    the processing queue.
+    in half, if its size (in records) exceeds the given threshold, and returning the newly-created chunk's filepath for
+    addition to the processing queue.
     """
     if max_chunk_size is None:
         return None
 
-    if not sys.getsizeof(content) > max_chunk_size:
+    if not len(content) > max_chunk_size:
         return None
 
     split_content = {}
@@ -118,9 +191,8 @@ def split_chunk_if_oversized(max_chunk_size: Union[int, None], parent_dir: str,
     return split_filepath
 
 
-def load_partial_history_to_records(fn: str) -> Iterable[AncestryRecord]:
-    with open(fn, "r") as infile:
-        content: Dict[str, SerializableAncestryRecordTypeDef] = json.load(infile)
-
-    for history_dict in content.values():
-        yield AncestryRecord.from_dict(history_dict)
+def load_partial_history_to_records(
+    fn: str, parse_parent_lidvid: Callable[[str], PdsLidVid] = PdsLidVid.from_string
+) -> Iterable[AncestryRecord]:
+    for _, history_dict in _iterate_history(fn):
+        yield AncestryRecord.from_dict(history_dict, parse_parent_lidvid=parse_parent_lidvid)
@@ -33,7 +33,7 @@ def get_already_loaded_lidvids(product_classes=None, es_conn=None):
     @param product_classes: list of the product classes you are interested in,
     e.g. "Product_Bundle", "Product_Collection" ...
     @param es_conn: elasticsearch.ElasticSearch instance for the ElasticSearch or OpenSearch connection
-    @return: the list of the already loaded PDS4 lidvid
+    @return: the set of the already loaded PDS4 lidvid
     """
 
     query = {"query": {"bool": {"should": [], "minimum_should_match": 1}}, "fields": ["_id"]}
@@ -45,5 +45,15 @@ def get_already_loaded_lidvids(product_classes=None, es_conn=None):
             dict(match_phrase={prod_class_prop: prod_class}) for prod_class in product_classes
         ]
 
-    prod_id_resp = opensearchpy.helpers.scan(es_conn, index=get_cross_cluster_indices(), query=query, scroll="3m")
-    return [p["_id"] for p in prod_id_resp]
+    # only the ids are needed, so sources are not fetched and pages are as large as the db permits
+    prod_id_resp = opensearchpy.helpers.scan(
+        es_conn,
+        index=get_cross_cluster_indices(),
+        query=query,
+        scroll="3m",
+        size=10000,
+        _source=False,
+        preserve_order=False,
+        request_timeout=120,
+    )
+    return {p["_id"] for p in prod_id_resp}
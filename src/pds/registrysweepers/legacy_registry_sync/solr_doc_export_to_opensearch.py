@@ -30,13 +30,13 @@ def pds4_id_field_fun(doc):
     @param doc: document from the legacy registry
     @return: lidvid
     """
-    if "version_id" in doc:
-        return doc["identifier"] + "::" + doc["version_id"][-1]
-    elif "identifier" in doc:
-        return doc["identifier"]
-    else:
+    identifier = doc.get("identifier")
+    if identifier is None:
         raise MissingIdentifierError()
 
+    version_ids = doc.get("version_id")
+    return f"{identifier}::{version_ids[-1]}" if version_ids is not None else identifier
+
 
 def get_node_from_file_ref(file_ref: str):
     """
@@ -48,7 +48,8 @@ def get_node_from_file_ref(file_ref: str):
     """
     file_path = os.fspath(file_ref)
     path = os.path.normpath(file_path)
-    dirs = path.split(os.sep)
+    # only the node folder is needed, so the remainder of the (long, per-label) path is left unsplit
+    dirs = path.split(os.sep, 5)
     return NODE_FOLDERS.get(dirs[4], "PDS_EN")
 
 
@@ -63,12 +64,13 @@ class SolrOsWrapperIter:
 
         @param solr_itr: iterator on the solr documents. SlowSolrDocs instance from the solr-to-es repository
         @param es_index: OpenSearch/ElasticSearch index name
-        @param found_ids: list of the lidvid already available in the new registry
+        @param found_ids: set of the lidvid already available in the new registry
         """
         self.index = es_index
         self.type = "_doc"
         self.id_field_fun = pds4_id_field_fun
-        self.found_ids = found_ids
+        # membership is tested for every document, so any given collection of ids is frozen into a set
+        self.found_ids = frozenset(found_ids or ())
         self.solr_itr = iter(solr_itr)
 
     def __iter__(self):
@@ -79,13 +81,16 @@ class SolrOsWrapperIter:
         new_doc["_index"] = self.index
         new_doc["_type"] = self.type
 
-        # remove empty fields
-        new_doc["_source"] = {}
-        for k, v in doc.items():
+        # the Solr document is discarded after conversion, so it's transformed in-place to become the new document's
+        # source, rather than being copied field-by-field.  Keys may only be added/removed once iteration is complete.
+        source = new_doc["_source"] = doc
+        node = None
+        invalid_fields = []
+        for k, v in source.items():
             # get the node from the data string
             # for example : /data/pds4/releases/ppi/galileo-traj-jup-20230818
             if k == "file_ref_location":
-                new_doc["_source"]["node"] = get_node_from_file_ref(v[0])
+                node = get_node_from_file_ref(v[0])
 
             # manage dates
             if "date" in k:
@@ -95,27 +100,33 @@ class SolrOsWrapperIter:
 
                 # validate dates
                 try:
-                    v = [datetime.fromisoformat(v[0].replace("Z", ""))]
-                    new_doc["_source"][k] = v
+                    date_str = v[0]
+                    if date_str.endswith("Z"):  # not supported by fromisoformat() prior to python 3.11
+                        date_str = date_str[:-1]
+                    source[k] = [datetime.fromisoformat(date_str)]
                 except ValueError:
                     log.warning("Date %s for field %s is invalid, assign default datetime 01-01-1950 instead", v, k)
-                    new_doc["_source"][k] = [datetime(1950, 1, 1, 0, 0, 0)]
+                    source[k] = [datetime(1950, 1, 1, 0, 0, 0)]
             elif "year" in k:
-                if len(v[0]) > 0:
-                    new_doc["_source"][k] = v
-                else:
+                # remove empty fields
+                if not len(v[0]) > 0:
                     log.warning("Year %s for field %s is invalid", v, k)
-            else:
-                new_doc["_source"][k] = v
+                    invalid_fields.append(k)
+
+        for k in invalid_fields:
+            del source[k]
+
+        if node is not None:
+            source["node"] = node
 
         # add modification date because kibana needs it for its time field
-        if "modification_date" not in new_doc["_source"]:
-            new_doc["_source"]["modification_date"] = [DEFAULT_MODIFICATION_DATE]
+        if "modification_date" not in source:
+            source["modification_date"] = [DEFAULT_MODIFICATION_DATE]
 
         if self.id_field_fun:
             id = self.id_field_fun(doc)
             new_doc["_id"] = id
-            new_doc["_source"]["found_in_registry"] = "true" if id in self.found_ids else "false"
+            source["found_in_registry"] = "true" if id in self.found_ids else "false"
 
         return new_doc
 
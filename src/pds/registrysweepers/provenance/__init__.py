@@ -42,6 +42,7 @@
 import functools
 import itertools
 import logging
+from collections import defaultdict
 from typing import Dict
 from typing import Iterable
 from typing import List
@@ -92,16 +93,12 @@ def create_record_chains(
     """
 
     # bin chains by LID
-    record_chains: Dict[PdsLid, List[ProvenanceRecord]] = {}
+    record_chains: Dict[PdsLid, List[ProvenanceRecord]] = defaultdict(list)
     for record in records:
-        if record.lidvid.lid not in record_chains:
-            record_chains[record.lidvid.lid] = []
         record_chains[record.lidvid.lid].append(record)
 
     if drop_singletons:
-        for lid, record_chain in list(record_chains.items()):
-            if not len(record_chain) > 1:
-                record_chains.pop(lid)
+        return [record_chain for record_chain in record_chains.values() if len(record_chain) > 1]
 
     return record_chains.values()
 
@@ -113,7 +110,9 @@ def link_records_in_chain(record_chain: List[ProvenanceRecord]):
 
     # this can theoretically be disabled for a minor performance improvement as records are already sorted when queried
     # but the benefit is likely to be minimal, and it's safer not to assume
-    record_chain.sort(key=lambda record: record.lidvid)
+    # records share a LID, so they're sorted on a plain (major, minor) int tuple, which compares in C rather than via
+    # PdsLidVid.__lt__
+    record_chain.sort(key=lambda record: (record.lidvid.vid.major_version, record.lidvid.vid.minor_version))
 
     for i in range(len(record_chain) - 1):
         record = record_chain[i]
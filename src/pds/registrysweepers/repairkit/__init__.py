@@ -58,15 +58,22 @@ def generate_updates(
     """Lazily generate necessary Update objects for a collection of db documents"""
     repair_already_logged_to_error = False
 
+    # REPAIR_TOOLS is flattened once, as it is consulted for every field of every document
+    repair_tools = tuple((matcher, tuple(funcs)) for matcher, funcs in REPAIR_TOOLS.items())
+
     for document in docs:
         id = document["_id"]
         src = document["_source"]
         repairs = {repairkit_version_metadata_key: int(repairkit_version)}
-        for fieldname, data in src.items():
-            for regex, funcs in REPAIR_TOOLS.items():
-                if regex(fieldname):
+        repairs_update = repairs.update
+        for fieldname in src:
+            for matcher, funcs in repair_tools:
+                if matcher(fieldname):
                     for func in funcs:
-                        repairs.update(func(src, fieldname))
+                        # repair funcs return an empty dict for the (overwhelmingly common) no-repair case
+                        field_repairs = func(src, fieldname)
+                        if field_repairs:
+                            repairs_update(field_repairs)
 
         document_needed_fixing = len(set(repairs).difference({repairkit_version_metadata_key})) > 0
         if document_needed_fixing and not repair_already_logged_to_error:
@@ -1,16 +1,24 @@
+import functools
 import json
 import logging
 import math
-import sys
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from typing import Callable
+from typing import DefaultDict
 from typing import Dict
 from typing import Iterable
 from typing import List
 from typing import Mapping
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
+import orjson
 from opensearchpy import OpenSearch
 from pds.registrysweepers.utils.db.update import Update
 from pds.registrysweepers.utils.misc import get_random_hex_id
@@ -19,6 +27,26 @@ from retry.api import retry_call
 
 log = logging.getLogger(__name__)
 
+# random extra delay (in seconds) added to each retry, so that concurrent workers (or sweepers) which failed together
+# against an overloaded node don't also retry in lockstep
+_retry_jitter_seconds = (0, 2)
+
+# Hit metadata which isn't consumed (_type, _score, sort values) is stripped from query responses server-side.  For the
+# many queries which only request one or two small _source fields, this metadata would otherwise make up a large share of
+# each page's transfer and parsing cost.  N.B. filtering omits empty branches, so "hits.hits" is absent from responses
+# without any hits, and the whole "hits" object is absent if hits.total also isn't tracked (i.e. the response is {}).
+_query_response_filter_path = ",".join(
+    [
+        "_scroll_id",
+        "hits.total",
+        "hits.hits._index",
+        "hits.hits._id",
+        "hits.hits._source",
+        "hits.hits._seq_no",
+        "hits.hits._primary_term",
+    ]
+)
+
 
 def query_registry_db_with_scroll(
     client: OpenSearch,
@@ -38,7 +66,8 @@ def query_registry_db_with_scroll(
 
     scroll_keepalive = f"{scroll_keepalive_minutes}m"
     query_id = get_random_hex_id()  # This is just used to differentiate queries during logging
-    log.debug(f"Initiating query (id {query_id}) of index {index_name}: {json.dumps(query)}")
+    if log.isEnabledFor(logging.DEBUG):  # queries may be very large (e.g. large terms filters), so avoid serializing
+        log.debug(f"Initiating query (id {query_id}) of index {index_name}: {json.dumps(query)}")
 
     served_hits = 0
 
@@ -47,74 +76,163 @@ def query_registry_db_with_scroll(
 
     more_data_exists = True
     scroll_id = None
-    while more_data_exists:
-        if scroll_id is None:
-
-            def fetch_func():
-                return client.search(
-                    index=index_name,
-                    body=query,
-                    scroll=scroll_keepalive,
-                    request_timeout=request_timeout_seconds,
-                    size=page_size,
-                    _source_includes=_source.get("includes", []),  # TODO: Break out from the enclosing _source object
-                    _source_excludes=_source.get("excludes", []),  # TODO: Break out from the enclosing _source object
-                )
+    # the scroll context is released even if the consumer stops iterating early, rather than being held by the cluster
+    # until its keepalive expires
+    try:
+        while more_data_exists:
+            if scroll_id is None:
+
+                def fetch_func():
+                    return client.search(
+                        index=index_name,
+                        body=query,
+                        scroll=scroll_keepalive,
+                        request_timeout=request_timeout_seconds,
+                        size=page_size,
+                        # TODO: Break out from the enclosing _source object
+                        _source_includes=_source.get("includes", []),
+                        _source_excludes=_source.get("excludes", []),
+                        filter_path=_query_response_filter_path,
+                    )
 
-        else:
+            else:
 
-            def fetch_func(_scroll_id: str = scroll_id):
-                return client.scroll(
-                    scroll_id=_scroll_id, scroll=scroll_keepalive, request_timeout=request_timeout_seconds
-                )
+                def fetch_func(_scroll_id: str = scroll_id):
+                    return client.scroll(
+                        scroll_id=_scroll_id,
+                        scroll=scroll_keepalive,
+                        request_timeout=request_timeout_seconds,
+                        filter_path=_query_response_filter_path,
+                    )
 
-        results = retry_call(
-            fetch_func,
-            tries=6,
-            delay=2,
-            backoff=2,
-            logger=log,
-        )
-        scroll_id = results.get("_scroll_id")
+            results = retry_call(
+                fetch_func,
+                tries=6,
+                delay=2,
+                backoff=2,
+                jitter=_retry_jitter_seconds,
+                logger=log,
+            )
+            scroll_id = results.get("_scroll_id")
 
-        total_hits = results["hits"]["total"]["value"]
-        if served_hits == 0:
-            log.debug(f"Query {query_id} returns {total_hits} total hits")
+            total_hits = results["hits"]["total"]["value"]
+            if served_hits == 0:
+                log.debug(f"Query {query_id} returns {total_hits} total hits")
 
-        response_hits = results["hits"]["hits"]
-        for hit in response_hits:
-            served_hits += 1
+            response_hits = results["hits"].get("hits", [])
+            yield from response_hits
 
-            percentage_of_hits_served = int(served_hits / total_hits * 100)
-            if last_info_log_at_percentage is None or percentage_of_hits_served >= (last_info_log_at_percentage + 5):
+            # progress is accounted per-page rather than per-hit, as pages are small relative to a full result set
+            served_hits += len(response_hits)
+            percentage_of_hits_served = int(served_hits / max(total_hits, 1) * 100)
+            if percentage_of_hits_served >= last_info_log_at_percentage + 5:
                 last_info_log_at_percentage = percentage_of_hits_served
                 log.debug(f"Query {query_id} progress: {percentage_of_hits_served}%")
 
-            yield hit
-
-        # This is a temporary, ad-hoc guard against empty/erroneous responses which do not return non-200 status codes.
-        # Previously, this has cause infinite loops in production due to served_hits sticking and never reaching the
-        # expected total hits value.
-        # TODO: Remove this upon implementation of https://github.com/NASA-PDS/registry-sweepers/issues/42
-        hits_data_present_in_response = len(response_hits) > 0
-        if not hits_data_present_in_response and served_hits < total_hits:
-            log.error(
-                f"Response for query {query_id} contained no hits when hits were expected.  Returned data is incomplete (got {served_hits} of {total_hits} total hits).  Response was: {results}"
+            # This is a temporary, ad-hoc guard against empty/erroneous responses which do not return non-200 status
+            # codes.  Previously, this has cause infinite loops in production due to served_hits sticking and never
+            # reaching the expected total hits value.
+            # TODO: Remove this upon implementation of https://github.com/NASA-PDS/registry-sweepers/issues/42
+            hits_data_present_in_response = len(response_hits) > 0
+            if not hits_data_present_in_response and served_hits < total_hits:
+                log.error(
+                    f"Response for query {query_id} contained no hits when hits were expected.  Returned data is incomplete (got {served_hits} of {total_hits} total hits).  Response was: {results}"
+                )
+                break
+
+            more_data_exists = served_hits < results["hits"]["total"]["value"]
+    finally:
+        if scroll_id is not None:
+            retry_call(
+                client.clear_scroll,
+                fkwargs={"scroll_id": scroll_id},
+                tries=6,
+                delay=2,
+                backoff=2,
+                jitter=_retry_jitter_seconds,
+                logger=log,
             )
-            break
 
-        more_data_exists = served_hits < results["hits"]["total"]["value"]
+    log.debug(f"Query {query_id} complete!")
 
-    retry_call(
-        client.clear_scroll,
-        fkwargs={"scroll_id": scroll_id},
-        tries=6,
-        delay=2,
-        backoff=2,
-        logger=log,
-    )
 
-    log.debug(f"Query {query_id} complete!")
+def query_registry_db_with_sliced_scroll(
+    client: OpenSearch,
+    index_name: str,
+    query: Dict,
+    _source: Dict,
+    slices: int,
+    page_size: int = 10000,
+    scroll_keepalive_minutes: int = 10,
+    request_timeout_seconds: int = 20,
+) -> Iterable[Dict]:
+    """
+    Given an OpenSearch client and query/_source, return an iterable collection of hits, fetched as a sliced scroll with
+    each slice paged concurrently by its own worker thread.  Hits are yielded in no particular order.
+
+    At most 2*slices pages are buffered ahead of the consumer, so memory use is bounded regardless of consumption rate.
+    """
+    if slices < 1:
+        raise ValueError(f"Cannot perform sliced scroll with fewer than 1 slice (got {slices})")
+
+    pages: queue.Queue = queue.Queue(maxsize=2 * slices)
+    slice_complete = object()  # sentinel, enqueued by each worker on exit
+    consumer_stopped = threading.Event()
+
+    def enqueue(item: Any):
+        while not consumer_stopped.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def scroll_slice(slice_id: int):
+        try:
+            sliced_query = {**query, "slice": {"id": slice_id, "max": slices}}
+            page: List[Dict] = []
+            for hit in query_registry_db_with_scroll(
+                client,
+                index_name,
+                sliced_query,
+                _source,
+                page_size=page_size,
+                scroll_keepalive_minutes=scroll_keepalive_minutes,
+                request_timeout_seconds=request_timeout_seconds,
+            ):
+                page.append(hit)
+                if len(page) >= page_size:
+                    enqueue(page)
+                    page = []
+
+                if consumer_stopped.is_set():
+                    return
+
+            if len(page) > 0:
+                enqueue(page)
+        except Exception as err:
+            enqueue(err)
+        finally:
+            enqueue(slice_complete)
+
+    log.debug(f"Initiating {slices}-slice scroll of index {index_name}")
+    with ThreadPoolExecutor(max_workers=slices, thread_name_prefix="sliced-scroll") as executor:
+        for slice_id in range(slices):
+            executor.submit(scroll_slice, slice_id)
+
+        try:
+            incomplete_slices_count = slices
+            while incomplete_slices_count > 0:
+                item = pages.get()
+                if item is slice_complete:
+                    incomplete_slices_count -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield from item
+        finally:
+            # release any workers still paging or blocked on a full queue, e.g. if the consumer stops early or a slice fails
+            consumer_stopped.set()
 
 
 def query_registry_db_with_search_after(
@@ -139,76 +257,84 @@ def query_registry_db_with_search_after(
     sort_fields = sort_fields or ["lidvid"]
 
     query_id = get_random_hex_id()  # This is just used to differentiate queries during logging
-    log.debug(f"Initiating query with id {query_id}: {json.dumps(query)}")
+    if log.isEnabledFor(logging.DEBUG):  # queries may be very large (e.g. large terms filters), so avoid serializing
+        log.debug(f"Initiating query with id {query_id}: {json.dumps(query)}")
 
     served_hits = 0
 
     last_info_log_at_percentage = 0
     log.debug(f"Query {query_id} progress: 0%")
 
-    more_data_exists = True
-    search_after_values: Union[List, None] = None
-    current_page = 1
-    expected_pages = None
-    while more_data_exists:
-        if search_after_values is not None:
-            query["search_after"] = search_after_values
-            log.debug(
-                f"Query {query_id} paging {page_size} hits (page {current_page} of {expected_pages}) with sort fields {sort_fields} and search-after values {search_after_values}"
-            )
-
-        def fetch_func():
-            return client.search(
-                index=index_name,
-                body=query,
-                request_timeout=request_timeout_seconds,
-                size=page_size,
-                sort=sort_fields,
-                _source_includes=_source.get("includes", []),  # TODO: Break out from the enclosing _source object
-                _source_excludes=_source.get("excludes", []),  # TODO: Break out from the enclosing _source object,
-                track_total_hits=True,
-            )
-
-        results = retry_call(
-            fetch_func,
+    # The total hit count is only requested for the first page, and is used for progress reporting.  Counting every
+    # matching document is expensive, and re-counting is actively misleading when the caller's own writes remove
+    # documents from the result set (e.g. by updating the sweeper version filtered on) during paging.
+    def fetch_page(search_after_values: Union[List, None]) -> Dict:
+        # the caller's query is left untouched, as it is shared with the prefetch thread
+        body = query if search_after_values is None else {**query, "search_after": search_after_values}
+        return retry_call(
+            client.search,
+            fkwargs={
+                "index": index_name,
+                "body": body,
+                "request_timeout": request_timeout_seconds,
+                "size": page_size,
+                "sort": sort_fields,
+                "_source_includes": _source.get("includes", []),  # TODO: Break out from the enclosing _source object
+                "_source_excludes": _source.get("excludes", []),  # TODO: Break out from the enclosing _source object
+                "track_total_hits": search_after_values is None,
+                "filter_path": _query_response_filter_path,
+            },
             tries=6,
             delay=2,
             backoff=2,
+            jitter=_retry_jitter_seconds,
             logger=log,
         )
 
-        total_hits = results["hits"]["total"]["value"]
-        current_page += 1
-        expected_pages = math.ceil(total_hits / page_size)
-        if served_hits == 0:
-            log.debug(f"Query {query_id} returns {total_hits} total hits")
+    current_page = 1
+    expected_pages = None
+    total_hits: Union[int, None] = None
+
+    # The search-after values for the next page are known as soon as a page is received, so the next page is fetched in
+    # the background while the hits of the current page are being consumed.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"query-{query_id}-prefetch") as executor:
+        pending_page: Union[Future, None] = executor.submit(fetch_page, None)
+        while pending_page is not None:
+            results = pending_page.result()
+            pending_page = None
+
+            current_page += 1
+            if total_hits is None:
+                total_hits = results["hits"]["total"]["value"]
+                expected_pages = math.ceil(total_hits / page_size)
+                log.debug(f"Query {query_id} returns {total_hits} total hits")
+
+            response_hits = results.get("hits", {}).get("hits", [])
+
+            # a partial page indicates that the result set is exhausted
+            more_data_exists = len(response_hits) == page_size
+            if more_data_exists:
+                search_after_values = [response_hits[-1]["_source"].get(field) for field in sort_fields]
+                log.debug(
+                    f"Query {query_id} paging {page_size} hits (page {current_page} of {expected_pages}) with sort fields {sort_fields} and search-after values {search_after_values}"
+                )
+                pending_page = executor.submit(fetch_page, search_after_values)
 
-        response_hits = results["hits"]["hits"]
-        for hit in response_hits:
-            served_hits += 1
+            yield from response_hits
 
-            percentage_of_hits_served = int(served_hits / total_hits * 100)
-            if last_info_log_at_percentage is None or percentage_of_hits_served >= (last_info_log_at_percentage + 5):
+            # progress is accounted per-page rather than per-hit, as pages are small relative to a full result set
+            served_hits += len(response_hits)
+            percentage_of_hits_served = int(served_hits / max(total_hits, 1) * 100)
+            if percentage_of_hits_served >= last_info_log_at_percentage + 5:
                 last_info_log_at_percentage = percentage_of_hits_served
                 log.debug(f"Query {query_id} progress: {percentage_of_hits_served}%")
 
-            yield hit
-
-            # simpler to set the value after every hit than worry about OBO errors detecting the last hit in the page
-            search_after_values = [hit["_source"].get(field) for field in sort_fields]
-
-        # This is a temporary, ad-hoc guard against empty/erroneous responses which do not return non-200 status codes.
-        # Previously, this has cause infinite loops in production due to served_hits sticking and never reaching the
-        # expected total hits value.
-        # TODO: Remove this upon implementation of https://github.com/NASA-PDS/registry-sweepers/issues/42
-        hits_data_present_in_response = len(response_hits) > 0
-        if not hits_data_present_in_response and served_hits < total_hits:
-            log.error(
-                f"Response for query {query_id} contained no hits when hits were expected.  Returned data is incomplete (got {served_hits} of {total_hits} total hits).  Response was: {results}"
-            )
-            break
-
-        more_data_exists = served_hits < results["hits"]["total"]["value"]
+            # Termination is decided by page size, so an empty final page is expected whenever the result set is an exact
+            # multiple of page_size, or shrank during paging (e.g. when the caller updates documents out of it)
+            if len(response_hits) == 0 and served_hits < total_hits:
+                log.debug(
+                    f"Query {query_id} result set was exhausted after {served_hits} of {total_hits} initially-counted hits"
+                )
 
     log.debug(f"Query {query_id} complete!")
 
@@ -249,64 +375,121 @@ def write_updated_docs(
     updated_doc_count = 0
 
     bulk_buffer_max_size_mb = 30.0
-    bulk_buffer_size_mb = 0.0
-    bulk_updates_buffer: List[str] = []
-    for update in updates:
-        buffered_updates_count = len(bulk_updates_buffer) // 2
-        buffer_at_size_threshold = bulk_buffer_size_mb >= bulk_buffer_max_size_mb
-        buffer_at_update_count_threshold = (
-            bulk_chunk_max_update_count is not None and buffered_updates_count >= bulk_chunk_max_update_count
-        )
-        flush_threshold_reached = buffer_at_size_threshold or buffer_at_update_count_threshold
-        threshold_log_str = (
-            f"{bulk_buffer_max_size_mb}MB" if buffer_at_size_threshold else f"{bulk_chunk_max_update_count}docs"
-        )
+    bulk_buffer_max_size_bytes = int(bulk_buffer_max_size_mb * 1024**2)
+    # statements are collected as parts and joined once per chunk, giving a single exactly-sized allocation per body
+    bulk_updates_buffer: List[bytes] = []
+    bulk_updates_buffer_size = 0
+    buffered_updates_count = 0
+
+    # Chunks are written from a background thread so that generation of the next chunk overlaps with the db round-trip
+    # of the previous one.  At most one write is in flight at a time, which bounds buffered content at two chunks.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-write") as executor:
+        pending_write: Union[Future, None] = None
+        for update in updates:
+            buffer_at_size_threshold = bulk_updates_buffer_size >= bulk_buffer_max_size_bytes
+            buffer_at_update_count_threshold = (
+                bulk_chunk_max_update_count is not None and buffered_updates_count >= bulk_chunk_max_update_count
+            )
+            flush_threshold_reached = buffer_at_size_threshold or buffer_at_update_count_threshold
 
-        if flush_threshold_reached:
-            log.debug(
-                f"Bulk update buffer has reached {threshold_log_str} threshold - writing {buffered_updates_count} document updates to db..."
+            if flush_threshold_reached:
+                threshold_log_str = (
+                    f"{bulk_buffer_max_size_mb}MB" if buffer_at_size_threshold else f"{bulk_chunk_max_update_count}docs"
+                )
+                log.debug(
+                    f"Bulk update buffer has reached {threshold_log_str} threshold - writing {buffered_updates_count} document updates to db..."
+                )
+                pending_write = _submit_bulk_updates_chunk(
+                    executor, pending_write, client, index_name, b"".join(bulk_updates_buffer)
+                )
+                bulk_updates_buffer = []
+                bulk_updates_buffer_size = 0
+                buffered_updates_count = 0
+
+            for statement in update_as_statements(update):
+                bulk_updates_buffer.append(statement)
+                bulk_updates_buffer.append(b"\n")
+                bulk_updates_buffer_size += len(statement) + 1
+            buffered_updates_count += 1
+            updated_doc_count += 1
+
+        if buffered_updates_count > 0:
+            log.debug(f"Writing documents updates for {buffered_updates_count} remaining products to db...")
+            pending_write = _submit_bulk_updates_chunk(
+                executor, pending_write, client, index_name, b"".join(bulk_updates_buffer)
             )
-            _write_bulk_updates_chunk(client, index_name, bulk_updates_buffer)
-            bulk_updates_buffer = []
-            bulk_buffer_size_mb = 0.0
 
-        update_statement_strs = update_as_statements(update)
+        if pending_write is not None:
+            pending_write.result()
 
-        for s in update_statement_strs:
-            bulk_buffer_size_mb += sys.getsizeof(s) / 1024**2
+    log.info(f"Updated documents for {updated_doc_count} total products!")
 
-        bulk_updates_buffer.extend(update_statement_strs)
-        updated_doc_count += 1
 
-    if len(bulk_updates_buffer) > 0:
-        log.debug(f"Writing documents updates for {buffered_updates_count} remaining products to db...")
-        _write_bulk_updates_chunk(client, index_name, bulk_updates_buffer)
+def _submit_bulk_updates_chunk(
+    executor: ThreadPoolExecutor,
+    pending_write: Union[Future, None],
+    client: OpenSearch,
+    index_name: str,
+    bulk_data: bytes,
+) -> Future:
+    """
+    Wait for any in-flight chunk write to complete (re-raising its failure, if any), then submit the given chunk for
+    writing and return its Future.
+    """
+    if pending_write is not None:
+        pending_write.result()
 
-    log.info(f"Updated documents for {updated_doc_count} total products!")
+    return executor.submit(_write_bulk_updates_chunk, client, index_name, bulk_data)
 
 
-def update_as_statements(update: Update) -> Iterable[str]:
-    """Given an Update, convert it to an ElasticSearch-style set of request body content strings"""
-    metadata_statement: Dict[str, Any] = {"update": {"_id": update.id}}
+def update_as_statements(update: Update) -> Iterable[bytes]:
+    """Given an Update, convert it to an ElasticSearch-style set of request body content statements"""
+    # The metadata statement has a fixed shape, so it is templated directly rather than built and encoded as a dict
+    escaped_id = orjson.dumps(update.id)
     if update.has_versioning_information():
-        metadata_statement["if_primary_term"] = update.primary_term
-        metadata_statement["if_seq_no"] = update.seq_no
-    content_statement = {"doc": update.content}
-    update_objs = [metadata_statement, content_statement]
-    updates_strs = [json.dumps(obj) for obj in update_objs]
-    return updates_strs
+        metadata_statement = b'{"update":{"_id":%b},"if_primary_term":%d,"if_seq_no":%d}' % (  # type: ignore
+            escaped_id,
+            update.primary_term,
+            update.seq_no,
+        )  # both are guaranteed non-None by has_versioning_information()
+    else:
+        metadata_statement = b'{"update":{"_id":%b}}' % escaped_id
+    content_statement = _serialize_content_statement(update.content)
+    return [metadata_statement, content_statement]
 
 
-@retry(tries=6, delay=15, backoff=2, logger=log)
-def _write_bulk_updates_chunk(client: OpenSearch, index_name: str, bulk_updates: Iterable[str]):
-    bulk_data = "\n".join(bulk_updates) + "\n"
+# Exact types (not subclasses) whose equal values always serialize identically, e.g. excluding bool/float since
+# True == 1 == 1.0 would allow cache collisions between contents which serialize differently
+_cacheable_content_value_types = frozenset({str, int, type(None)})
 
+
+def _serialize_content_statement(content: Dict) -> bytes:
+    # Many sweepers write identical small, flat content to very many documents (e.g. repairkit, which usually writes only its
+    # version metadata), so such content is serialized once and cached.
+    if len(content) <= 4 and all(type(v) in _cacheable_content_value_types for v in content.values()):
+        return _serialize_flat_content_statement(tuple(content.items()))
+    return orjson.dumps({"doc": content})
+
+
+@functools.lru_cache(maxsize=1024)
+def _serialize_flat_content_statement(content_items: Tuple) -> bytes:
+    return orjson.dumps({"doc": dict(content_items)})
+
+
+@retry(tries=6, delay=15, backoff=2, jitter=_retry_jitter_seconds, logger=log)
+def _write_bulk_updates_chunk(client: OpenSearch, index_name: str, bulk_data: bytes):
     request_timeout = 90
     response_content = client.bulk(index=index_name, body=bulk_data, request_timeout=request_timeout)
 
     if response_content.get("errors"):
         warn_types = {"document_missing_exception"}  # these types represent bad data, not bad sweepers behaviour
-        items_with_problems = [item for item in response_content["items"] if "error" in item["update"]]
+        # problem items are partitioned into warnings and errors in a single pass over the response
+        items_with_warnings: List[Dict] = []
+        items_with_errors: List[Dict] = []
+        for item in response_content["items"]:
+            error = item["update"].get("error")
+            if error is not None:
+                (items_with_warnings if error["type"] in warn_types else items_with_errors).append(item)
 
         def get_ids_list_str(ids: List[str]) -> str:
             max_display_ids = 50
@@ -317,9 +500,6 @@ def _write_bulk_updates_chunk(client: OpenSearch, index_name: str, bulk_updates:
                 return f"{str(ids[:max_display_ids])} <list of {ids_count} ids truncated - enable DEBUG logging for full list>"
 
         if log.isEnabledFor(logging.WARNING):
-            items_with_warnings = [
-                item for item in items_with_problems if item["update"]["error"]["type"] in warn_types
-            ]
             warning_aggregates = aggregate_update_error_types(items_with_warnings)
             for error_type, reason_aggregate in warning_aggregates.items():
                 for error_reason, ids in reason_aggregate.items():
@@ -329,9 +509,6 @@ def _write_bulk_updates_chunk(client: OpenSearch, index_name: str, bulk_updates:
                     )
 
         if log.isEnabledFor(logging.ERROR):
-            items_with_errors = [
-                item for item in items_with_problems if item["update"]["error"]["type"] not in warn_types
-            ]
             error_aggregates = aggregate_update_error_types(items_with_errors)
             for error_type, reason_aggregate in error_aggregates.items():
                 for error_reason, ids in reason_aggregate.items():
@@ -345,24 +522,16 @@ def _write_bulk_updates_chunk(client: OpenSearch, index_name: str, bulk_updates:
 
 def aggregate_update_error_types(items: Iterable[Dict]) -> Mapping[str, Dict[str, List[str]]]:
     """Return a nested aggregation of ids, aggregated first by error type, then by reason"""
-    agg: Dict[str, Dict[str, List[str]]] = {}
+    agg: DefaultDict[str, DefaultDict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
     for item in items:
-        id = item["update"]["_id"]
-        error = item["update"]["error"]
-        error_type = error["type"]
-        error_reason = error["reason"]
-        if error_type not in agg:
-            agg[error_type] = {}
-
-        if error_reason not in agg[error_type]:
-            agg[error_type][error_reason] = []
-
-        agg[error_type][error_reason].append(id)
+        update_result = item["update"]
+        error = update_result["error"]
+        agg[error["type"]][error["reason"]].append(update_result["_id"])
 
     return agg
 
 
-@retry(tries=6, delay=15, backoff=2, logger=log)
+@retry(tries=6, delay=15, backoff=2, jitter=_retry_jitter_seconds, logger=log)
 def get_query_hits_count(client: OpenSearch, index_name: str, query: Dict) -> int:
     response = client.search(index=index_name, body=query, size=0, _source_includes=[], track_total_hits=True)
 
@@ -1,7 +1,32 @@
 import json
 import os
 
+import orjson
 from opensearchpy.client import OpenSearch
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Drop-in replacement for the default opensearch-py serializer, using orjson to decode query responses and encode
+    request bodies.  Pre-serialized (str/bytes) bodies, such as bulk request payloads, are passed through untouched.
+    """
+
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as err:
+            raise SerializationError(s, err)
+
+    def dumps(self, data):
+        if isinstance(data, (str, bytes)):
+            return data
+
+        try:
+            return orjson.dumps(data, default=self.default).decode("utf-8")
+        except orjson.JSONEncodeError as err:
+            raise SerializationError(data, err)
 
 
 def get_opensearch_client_from_environment(verify_certs: bool = True) -> OpenSearch:
@@ -17,7 +42,9 @@ def get_opensearch_client_from_environment(verify_certs: bool = True) -> OpenSea
     return get_opensearch_client(endpoint_url, username, password, verify_certs)
 
 
-def get_opensearch_client(endpoint_url: str, username: str, password: str, verify_certs: bool = True) -> OpenSearch:
+def get_opensearch_client(
+    endpoint_url: str, username: str, password: str, verify_certs: bool = True, pool_maxsize: int = 32
+) -> OpenSearch:
     try:
         scheme, host, port_str = endpoint_url.replace("://", ":", 1).split(":")
         port = int(port_str)
@@ -30,5 +57,13 @@ def get_opensearch_client(endpoint_url: str, username: str, password: str, verif
     auth = (username, password)
 
     return OpenSearch(
-        hosts=[{"host": host, "port": int(port)}], http_auth=auth, use_ssl=use_ssl, verify_certs=verify_certs
+        hosts=[{"host": host, "port": int(port)}],
+        http_auth=auth,
+        use_ssl=use_ssl,
+        verify_certs=verify_certs,
+        serializer=OrjsonSerializer(),
+        # the client is shared by concurrent scroll-slice and bulk-write threads, so keep enough pooled keepalive
+        # connections that they don't churn through (or block on) the default pool of 10
+        maxsize=pool_maxsize,
+        http_compress=True,
     )
@@ -3,8 +3,10 @@ from __future__ import annotations
 import functools
 
 
-@functools.total_ordering
 class MajorMinorVersion:
+    # Instances are held by every PdsLidVid, so per-instance __dict__ overhead is avoided
+    __slots__ = ("major_version", "minor_version")
+
     major_version_minimum = 0
     minor_version_minimum = 0
 
@@ -20,18 +22,13 @@ class MajorMinorVersion:
 
     @classmethod
     def from_string(cls, version_str: str):
-        major_version_chunk, minor_version_chunk = version_str.split(".")
-
-        major_version = int(major_version_chunk)
-        minor_version = int(minor_version_chunk)
-
-        return cls(major_version, minor_version)
+        return _parse_version(cls, version_str)  # type: ignore  # classes are hashable
 
     def __str__(self):
         return f"{self.major_version}.{self.minor_version}"
 
     def __hash__(self):
-        return hash(str(self))
+        return hash((self.major_version, self.minor_version))
 
     def __repr__(self):
         return f"{self.__class__.__name__}({str(self)})"
@@ -39,10 +36,27 @@ class MajorMinorVersion:
     def __eq__(self, other):
         return self.major_version == other.major_version and self.minor_version == other.minor_version
 
+    # Comparisons are written out directly (rather than derived by functools.total_ordering) as plain tuple comparisons
     def __lt__(self, other):
-        if self.major_version != other.major_version:
-            return self.major_version < other.major_version
-        elif self.minor_version != other.minor_version:
-            return self.minor_version < other.minor_version
-        else:
-            return False
+        return (self.major_version, self.minor_version) < (other.major_version, other.minor_version)
+
+    def __le__(self, other):
+        return (self.major_version, self.minor_version) <= (other.major_version, other.minor_version)
+
+    def __gt__(self, other):
+        return (self.major_version, self.minor_version) > (other.major_version, other.minor_version)
+
+    def __ge__(self, other):
+        return (self.major_version, self.minor_version) >= (other.major_version, other.minor_version)
+
+
+# Very few distinct version strings exist (e.g. "1.0"), and versions are immutable, so each distinct string is parsed only
+# once and the resulting instance is shared, e.g. between all the PdsLidVids with that version
+@functools.lru_cache(maxsize=2**12)
+def _parse_version(cls, version_str: str):
+    major_version_chunk, minor_version_chunk = version_str.split(".")
+
+    major_version = int(major_version_chunk)
+    minor_version = int(minor_version_chunk)
+
+    return cls(major_version, minor_version)
@@ -1,9 +1,11 @@
+import itertools
 import os
 import random
-from datetime import datetime
+import time
 from typing import Any
 from typing import Callable
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import TypeVar
 from typing import Union
@@ -45,17 +47,17 @@ def coerce_non_list_type(db_value: Union[T, List[T]], support_null: bool = False
         return db_value
 
 
-def get_human_readable_elapsed_since(begin: datetime) -> str:
-    elapsed_seconds = (datetime.now() - begin).total_seconds()
-    h = int(elapsed_seconds / 3600)
-    m = int(elapsed_seconds % 3600 / 60)
-    s = int(elapsed_seconds % 60)
+def get_human_readable_elapsed_since(begin: float) -> str:
+    """Given a begin time obtained from time.monotonic(), return the elapsed time in a form like 1h2m3s"""
+    elapsed_seconds = int(time.monotonic() - begin)
+    h, remainder_seconds = divmod(elapsed_seconds, 3600)
+    m, s = divmod(remainder_seconds, 60)
     return (f"{h}h" if h else "") + (f"{m}m" if m else "") + f"{s}s"
 
 
 def get_random_hex_id(id_len: int = 6) -> str:
-    val = random.randint(0, 16**id_len)
-    return hex(val)[2:]
+    # each hex digit encodes 4 bits, and zero-padding ensures ids are always of the requested length
+    return f"{random.getrandbits(id_len * 4):0{id_len}x}"
 
 
 def auto_raise_for_status(f: Callable) -> Callable:
@@ -82,7 +84,14 @@ def iterate_pages_of_size(page_size: int, iterable: Iterable[T]) -> Iterable[Lis
     if page_size < 1:
         raise ValueError(f"Cannot iterate over pages of size <1 (got {page_size})")
 
-    return iterate_pages_given(lambda page: len(page) < page_size, iterable)
+    return _iterate_pages_of_size(page_size, iter(iterable))
+
+
+def _iterate_pages_of_size(page_size: int, iterator: Iterator[T]) -> Iterator[List[T]]:
+    page = list(itertools.islice(iterator, page_size))
+    while page:
+        yield page
+        page = list(itertools.islice(iterator, page_size))
 
 
 def iterate_pages_given(build_page_while: Callable[[List[T]], bool], iterable: Iterable[T]) -> Iterable[List[T]]:
@@ -40,7 +40,8 @@ class PdsLid(PdsProductIdentifier):
     @property
     def _fields_count(self):
         """Return the number of name fields contained in this LID"""
-        return len(self._fields)
+        # counting separators avoids allocating a list of fields for every is_bundle()/is_collection()/... check
+        return self.value.count(":") + 1
 
     def is_bundle(self):
         return self._fields_count == 4
@@ -53,7 +54,7 @@ class PdsLid(PdsProductIdentifier):
 
     def _get_field(self, index: int) -> str:
         try:
-            return self.value.split(":")[index]
+            return self._fields[index]
         except IndexError:
             return ""
 
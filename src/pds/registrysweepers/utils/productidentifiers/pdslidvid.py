@@ -11,12 +11,18 @@ from pds.registrysweepers.utils.productidentifiers.pdsvid import PdsVid
 class PdsLidVid(PdsProductIdentifier):
     def __init__(self, lid: PdsLid, vid: PdsVid):
         self._lid = lid
-        self.vid = vid
+        self._vid = vid
+        # LIDVIDs are immutable, and are stringified for every hash, so the canonical string form is computed only once
+        self._str = str(lid) + PdsProductIdentifier.LIDVID_SEPARATOR + str(vid)
 
     @property
     def lid(self) -> PdsLid:
         return self._lid
 
+    @property
+    def vid(self) -> PdsVid:
+        return self._vid
+
     @staticmethod
     def from_string(lidvid_str: str) -> PdsLidVid:
         lid_chunk, vid_chunk = lidvid_str.split(PdsProductIdentifier.LIDVID_SEPARATOR)
@@ -25,10 +31,10 @@ class PdsLidVid(PdsProductIdentifier):
         return PdsLidVid(lid, vid)
 
     def __str__(self):
-        return str(self.lid) + PdsProductIdentifier.LIDVID_SEPARATOR + str(self.vid)
+        return self._str
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self._str)
 
     def __repr__(self):
         return f"PdsLidVid({str(self)})"
@@ -37,7 +43,7 @@ class PdsLidVid(PdsProductIdentifier):
         if not isinstance(other, PdsLidVid):
             return False
 
-        return self.lid == other.lid and self.vid == other.vid
+        return self._str == other._str
 
     def __lt__(self, other: PdsLidVid):
         if self.lid != other.lid:
@@ -2,5 +2,7 @@ from pds.registrysweepers.utils.majorminorversion import MajorMinorVersion
 
 
 class PdsVid(MajorMinorVersion):
+    __slots__ = ()
+
     major_version_minimum = 0
     minor_version_minimum = 0
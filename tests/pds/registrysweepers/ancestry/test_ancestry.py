@@ -1,7 +1,7 @@
-import itertools
 import os.path
 import unittest
 from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Tuple
 
@@ -15,11 +15,40 @@ from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
 
 from tests.mocks.registryquerymock import RegistryQueryMock
 
+# resolved relative to this module rather than the working directory, so the suite may be run from anywhere
+_resources_dirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
+
+def _partition_records(target, records: Iterable[AncestryRecord]) -> None:
+    """
+    Sort records by product type in a single pass, populating the per-type record lists and lidvid-string-keyed lookups
+    used by the test cases on target (a test case class or instance)
+    """
+    target.bundle_records = []
+    target.collection_records = []
+    target.nonaggregate_records = []
+    target.records_by_lidvid_str = {}
+    target.bundle_records_by_lidvid_str = {}
+    target.collection_records_by_lidvid_str = {}
+    target.nonaggregate_records_by_lidvid_str = {}
+
+    for record in records:
+        lidvid = record.lidvid
+        lidvid_str = str(lidvid)
+        target.records_by_lidvid_str[lidvid_str] = record
+        if lidvid.is_bundle():
+            target.bundle_records.append(record)
+            target.bundle_records_by_lidvid_str[lidvid_str] = record
+        elif lidvid.is_collection():
+            target.collection_records.append(record)
+            target.collection_records_by_lidvid_str[lidvid_str] = record
+        elif lidvid.is_basic_product():
+            target.nonaggregate_records.append(record)
+            target.nonaggregate_records_by_lidvid_str[lidvid_str] = record
+
 
 class AncestryBasicTestCase(unittest.TestCase):
-    input_file_path = os.path.abspath(
-        "./tests/pds/registrysweepers/ancestry/resources/test_ancestry_mock_AncestryFunctionalTestCase.json"
-    )
+    input_file_path = os.path.join(_resources_dirpath, "test_ancestry_mock_AncestryFunctionalTestCase.json")
     registry_query_mock = RegistryQueryMock(input_file_path)
 
     ancestry_records: List[AncestryRecord] = []
@@ -29,9 +58,7 @@ class AncestryBasicTestCase(unittest.TestCase):
         "a:b:c:bundle:lidrefcollection::1.0": {"a:b:c:bundle::1.0"},
         "a:b:c:bundle:lidrefcollection::2.0": {"a:b:c:bundle::1.0"},
         "a:b:c:bundle:lidvidrefcollection::1.0": {"a:b:c:bundle::1.0"},
-        "a:b:c:bundle:lidvidrefcollection::2.0": {
-            # intentionally empty
-        },
+        "a:b:c:bundle:lidvidrefcollection::2.0": set(),  # intentionally empty
     }
 
     expected_collection_ancestry_by_nonaggregate = {
@@ -66,18 +93,7 @@ class AncestryBasicTestCase(unittest.TestCase):
             bulk_updates_sink=cls.bulk_updates,
         )
 
-        cls.bundle_records = [r for r in cls.ancestry_records if r.lidvid.is_bundle()]
-        cls.collection_records = [r for r in cls.ancestry_records if r.lidvid.is_collection()]
-        cls.nonaggregate_records = [r for r in cls.ancestry_records if r.lidvid.is_basic_product()]
-
-        cls.records_by_lidvid_str = {str(r.lidvid): r for r in cls.ancestry_records}
-        cls.bundle_records_by_lidvid_str = {str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_bundle()}
-        cls.collection_records_by_lidvid_str = {
-            str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_collection()
-        }
-        cls.nonaggregate_records_by_lidvid_str = {
-            str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_basic_product()
-        }
+        _partition_records(cls, cls.ancestry_records)
 
         cls.updates_by_lidvid_str = {id: content for id, content in cls.bulk_updates}
 
@@ -92,23 +108,28 @@ class AncestryBasicTestCase(unittest.TestCase):
 
     def test_collections_have_correct_bundle_ancestry(self):
         for record in self.collection_records:
-            expected_bundle_ancestry = set(self.expected_bundle_ancestry_by_collection[str(record.lidvid)])
-            self.assertEqual(expected_bundle_ancestry, set(str(id) for id in record.parent_bundle_lidvids))
+            expected_bundle_ancestry = self.expected_bundle_ancestry_by_collection[str(record.lidvid)]
+            self.assertSetEqual(expected_bundle_ancestry, {str(id) for id in record.parent_bundle_lidvids})
 
     def test_nonaggregates_have_correct_collection_ancestry(self):
         for record in self.nonaggregate_records:
-            expected_collection_ancestry = set(self.expected_collection_ancestry_by_nonaggregate[str(record.lidvid)])
-            self.assertEqual(expected_collection_ancestry, set(str(id) for id in record.parent_collection_lidvids))
+            expected_collection_ancestry = self.expected_collection_ancestry_by_nonaggregate[str(record.lidvid)]
+            self.assertSetEqual(expected_collection_ancestry, {str(id) for id in record.parent_collection_lidvids})
 
     def test_nonaggregates_have_correct_bundle_ancestry(self):
-        print(
-            "#### N.B. This test will always fail if test_nonaggregates_have_correct_collection_ancestry() fails! ####"
-        )
+        # bundle ancestry is derived from collection ancestry, so this test is only meaningful if the latter is correct
+        if any(
+            {str(id) for id in record.parent_collection_lidvids}
+            != self.expected_collection_ancestry_by_nonaggregate[str(record.lidvid)]
+            for record in self.nonaggregate_records
+        ):
+            self.skipTest("depends on test_nonaggregates_have_correct_collection_ancestry(), which will fail")
+
         for record in self.nonaggregate_records:
-            parent_collection_id_strs = set(str(id) for id in record.parent_collection_lidvids)
-            parent_bundle_id_strs = set(str(id) for id in record.parent_bundle_lidvids)
-            expected_bundle_id_strs = set(
-                itertools.chain(*[self.expected_bundle_ancestry_by_collection[id] for id in parent_collection_id_strs])
+            parent_collection_id_strs = {str(id) for id in record.parent_collection_lidvids}
+            parent_bundle_id_strs = {str(id) for id in record.parent_bundle_lidvids}
+            expected_bundle_id_strs = set().union(
+                *(self.expected_bundle_ancestry_by_collection[id] for id in parent_collection_id_strs)
             )
             self.assertEqual(expected_bundle_id_strs, parent_bundle_id_strs)
 
@@ -116,11 +137,11 @@ class AncestryBasicTestCase(unittest.TestCase):
         for record in self.ancestry_records:
             update = self.updates_by_lidvid_str[str(record.lidvid)]
             self.assertEqual(
-                set(str(lidvid) for lidvid in record.parent_bundle_lidvids),
+                {str(lidvid) for lidvid in record.parent_bundle_lidvids},
                 set(update["ops:Provenance/ops:parent_bundle_identifier"]),
             )
             self.assertEqual(
-                set(str(lidvid) for lidvid in record.parent_collection_lidvids),
+                {str(lidvid) for lidvid in record.parent_collection_lidvids},
                 set(update["ops:Provenance/ops:parent_collection_identifier"]),
             )
 
@@ -130,20 +151,18 @@ class AncestryBasicTestCase(unittest.TestCase):
             record = self.records_by_lidvid_str[doc_id]
             self.assertEqual(
                 set(update["ops:Provenance/ops:parent_bundle_identifier"]),
-                set(str(lidvid) for lidvid in record.parent_bundle_lidvids),
+                {str(lidvid) for lidvid in record.parent_bundle_lidvids},
             )
             self.assertEqual(
                 set(update["ops:Provenance/ops:parent_collection_identifier"]),
-                set(str(lidvid) for lidvid in record.parent_collection_lidvids),
+                {str(lidvid) for lidvid in record.parent_collection_lidvids},
             )
 
             self.assertEqual(SWEEPERS_ANCESTRY_VERSION, update[SWEEPERS_ANCESTRY_VERSION_METADATA_KEY])
 
 
 class AncestryAlternateIdsTestCase(unittest.TestCase):
-    input_file_path = os.path.abspath(
-        "./tests/pds/registrysweepers/ancestry/resources/test_ancestry_mock_AncestryAlternateIdsTestCase.json"
-    )
+    input_file_path = os.path.join(_resources_dirpath, "test_ancestry_mock_AncestryAlternateIdsTestCase.json")
     registry_query_mock = RegistryQueryMock(input_file_path)
 
     ancestry_records: List[AncestryRecord] = []
@@ -158,18 +177,7 @@ class AncestryAlternateIdsTestCase(unittest.TestCase):
             bulk_updates_sink=cls.bulk_updates,
         )
 
-        cls.bundle_records = [r for r in cls.ancestry_records if r.lidvid.is_bundle()]
-        cls.collection_records = [r for r in cls.ancestry_records if r.lidvid.is_collection()]
-        cls.nonaggregate_records = [r for r in cls.ancestry_records if r.lidvid.is_basic_product()]
-
-        cls.records_by_lidvid_str = {str(r.lidvid): r for r in cls.ancestry_records}
-        cls.bundle_records_by_lidvid_str = {str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_bundle()}
-        cls.collection_records_by_lidvid_str = {
-            str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_collection()
-        }
-        cls.nonaggregate_records_by_lidvid_str = {
-            str(r.lidvid): r for r in cls.ancestry_records if r.lidvid.is_basic_product()
-        }
+        _partition_records(cls, cls.ancestry_records)
 
         cls.updates_by_lidvid_str = {id: content for id, content in cls.bulk_updates}
 
@@ -215,7 +223,7 @@ class AncestryAlternateIdsTestCase(unittest.TestCase):
         nonaggregate products within all collections that share a LID alias with it.
         """
         collection_records = [r for r in self.collection_records if r.lidvid.collection_name.upper() == "CL"]
-        collection_lids = [r.lidvid.lid for r in collection_records]
+        collection_lids = {r.lidvid.lid for r in collection_records}
         self.assertEqual(3, len(collection_records))
 
         products = [p for p in self.nonaggregate_records if p.lidvid.parent_collection_lid in collection_lids]
@@ -251,9 +259,7 @@ class AncestryAlternateIdsTestCase(unittest.TestCase):
 
 
 class AncestryMalformedDocsTestCase(unittest.TestCase):
-    input_file_path = os.path.abspath(
-        "./tests/pds/registrysweepers/ancestry/resources/test_ancestry_mock_AncestryMalformedDocsTestCase.json"
-    )
+    input_file_path = os.path.join(_resources_dirpath, "test_ancestry_mock_AncestryMalformedDocsTestCase.json")
     registry_query_mock = RegistryQueryMock(input_file_path)
 
     ancestry_records: List[AncestryRecord] = []
@@ -267,26 +273,13 @@ class AncestryMalformedDocsTestCase(unittest.TestCase):
             bulk_updates_sink=self.bulk_updates,
         )
 
-        self.bundle_records = [r for r in self.ancestry_records if r.lidvid.is_bundle()]
-        self.collection_records = [r for r in self.ancestry_records if r.lidvid.is_collection()]
-        self.nonaggregate_records = [r for r in self.ancestry_records if r.lidvid.is_basic_product()]
-
-        self.records_by_lidvid_str = {str(r.lidvid): r for r in self.ancestry_records}
-        self.bundle_records_by_lidvid_str = {str(r.lidvid): r for r in self.ancestry_records if r.lidvid.is_bundle()}
-        self.collection_records_by_lidvid_str = {
-            str(r.lidvid): r for r in self.ancestry_records if r.lidvid.is_collection()
-        }
-        self.nonaggregate_records_by_lidvid_str = {
-            str(r.lidvid): r for r in self.ancestry_records if r.lidvid.is_basic_product()
-        }
+        _partition_records(self, self.ancestry_records)
 
         self.updates_by_lidvid_str = {id: content for id, content in self.bulk_updates}
 
 
 class AncestryLegacyTypesTestCase(unittest.TestCase):
-    input_file_path = os.path.abspath(
-        "./tests/pds/registrysweepers/ancestry/resources/test_ancestry_mock_AncestryLegacyTypesTestCase.json"
-    )
+    input_file_path = os.path.join(_resources_dirpath, "test_ancestry_mock_AncestryLegacyTypesTestCase.json")
     registry_query_mock = RegistryQueryMock(input_file_path)
 
     def test_collection_refs_parsing(self):
@@ -306,9 +299,7 @@ class AncestryLegacyTypesTestCase(unittest.TestCase):
 
 
 class AncestryMemoryOptimizedTestCase(unittest.TestCase):
-    input_file_path = os.path.abspath(
-        "./tests/pds/registrysweepers/ancestry/resources/test_ancestry_mock_AncestryMemoryOptimizedTestCase.json"
-    )
+    input_file_path = os.path.join(_resources_dirpath, "test_ancestry_mock_AncestryMemoryOptimizedTestCase.json")
     registry_query_mock = RegistryQueryMock(input_file_path)
 
     def test_ancestor_reference_aggregation(self):
@@ -317,6 +308,12 @@ class AncestryMemoryOptimizedTestCase(unittest.TestCase):
         references from queries.
         Does NOT test correctness those queries themselves, though those have been tested manually and are simple.
         """
+        self._test_ancestor_reference_aggregation(utilize_chunking=True)
+
+    def test_ancestor_reference_aggregation_without_chunking(self):
+        self._test_ancestor_reference_aggregation(utilize_chunking=False)
+
+    def _test_ancestor_reference_aggregation(self, utilize_chunking: bool):
         bundle = PdsLidVid.from_string("a:b:c:bundle::1.0")
 
         collection1_1 = PdsLidVid.from_string("a:b:c:bundle:first_collection::1.0")
@@ -335,7 +332,9 @@ class AncestryMemoryOptimizedTestCase(unittest.TestCase):
 
         query_mock_f = self.registry_query_mock.get_mocked_query
         collection_ancestry_records = set(
-            get_nonaggregate_ancestry_records(None, collection_ancestry_records, query_mock_f)
+            get_nonaggregate_ancestry_records(
+                None, collection_ancestry_records, query_mock_f, utilize_chunking=utilize_chunking
+            )
         )
 
         self.assertEqual(
@@ -1,3 +1,4 @@
+import functools
 import unittest
 
 from pds.registrysweepers.ancestry import AncestryRecord
@@ -25,6 +26,31 @@ class AncestryRecordTestCase(unittest.TestCase):
         self.assertEqual(record, AncestryRecord.from_dict(expected_dict_repr))
         self.assertEqual(expected_dict_repr, record.to_dict())
 
+    def test_from_dict_uses_supplied_parent_parser(self):
+        dicts = [
+            {
+                "lidvid": f"a:b:c:d:e:{x}::1.0",
+                "parent_collection_lidvids": ["a:b:c:d:e::1.0"],
+                "parent_bundle_lidvids": ["a:b:c:d::1.0"],
+            }
+            for x in ["f", "g"]
+        ]
+
+        parse_parent_lidvid = functools.lru_cache(maxsize=None)(PdsLidVid.from_string)
+        records = [AncestryRecord.from_dict(d, parse_parent_lidvid=parse_parent_lidvid) for d in dicts]
+
+        self.assertListEqual([AncestryRecord.from_dict(d) for d in dicts], records)
+        first_parent, second_parent = (next(iter(r.parent_collection_lidvids)) for r in records)
+        self.assertIs(first_parent, second_parent)
+
+    def test_default_parent_sets_are_not_shared(self):
+        a = AncestryRecord(lidvid=PdsLidVid.from_string("a:b:c:d:e:f::1.0"))
+        b = AncestryRecord(lidvid=PdsLidVid.from_string("a:b:c:d:e:g::1.0"))
+        a.parent_bundle_lidvids.add(PdsLidVid.from_string("a:b:c:d::1.0"))
+
+        self.assertSetEqual(set(), b.parent_bundle_lidvids)
+        self.assertFalse(hasattr(a, "__dict__"), "AncestryRecord instances should not carry a __dict__")
+
     def test_update_with_basic_functionality(self):
         lidvid_str = "a:b:c:d:e:f::1.0"
         mismatched_lidvid_str = "a:b:c:d:e:f::2.0"
@@ -3,8 +3,12 @@ import os
 import shutil
 import tempfile
 import unittest
+from unittest.mock import patch
 
 from pds.registrysweepers.ancestry import AncestryRecord
+from pds.registrysweepers.ancestry.runtimeconstants import AncestryRuntimeConstants
+from pds.registrysweepers.ancestry.utils import dump_history_to_disk
+from pds.registrysweepers.ancestry.utils import load_partial_history_to_records
 from pds.registrysweepers.ancestry.utils import make_history_serializable
 from pds.registrysweepers.ancestry.utils import merge_matching_history_chunks
 from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
@@ -41,6 +45,52 @@ class TestMakeHistorySerializableTestCase(unittest.TestCase):
         self.assertDictEqual(expected, input)
 
 
+class TestDumpHistoryToDiskTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_of_unconverted_history(self):
+        history = {
+            "a:b:c:d:e:f::1.0": {
+                "lidvid": "a:b:c:d:e:f::1.0",
+                "parent_collection_lidvids": {"a:b:c:d:e::1.0"},
+                "parent_bundle_lidvids": {"a:b:c:d::1.0"},
+            }
+        }
+
+        fp = dump_history_to_disk(self.temp_dir, history)
+        records = list(load_partial_history_to_records(fp))
+
+        expected = AncestryRecord(
+            lidvid=PdsLidVid.from_string("a:b:c:d:e:f::1.0"),
+            parent_collection_lidvids={PdsLidVid.from_string("a:b:c:d:e::1.0")},
+            parent_bundle_lidvids={PdsLidVid.from_string("a:b:c:d::1.0")},
+        )
+        self.assertListEqual([expected], records)
+
+    @patch.object(AncestryRuntimeConstants, "compress_disk_chunks", True)
+    def test_round_trip_with_compression(self):
+        history = {
+            f"a:b:c:d:e:{x}::1.0": {
+                "lidvid": f"a:b:c:d:e:{x}::1.0",
+                "parent_collection_lidvids": {"a:b:c:d:e::1.0"},
+                "parent_bundle_lidvids": {"a:b:c:d::1.0"},
+            }
+            for x in ["A", "B", "C"]
+        }
+
+        fp = dump_history_to_disk(self.temp_dir, history)
+        with open(fp, "rb") as infile:
+            self.assertEqual(b"\x1f\x8b", infile.read(2))  # gzip magic number
+
+        records = list(load_partial_history_to_records(fp))
+        self.assertEqual(3, len(records))
+        self.assertListEqual(list(history.keys()), [str(r.lidvid) for r in records])
+
+
 class TestMergeMatchingHistoryChunksTestCase(unittest.TestCase):
     def setUp(self):
         setup_fp = os.path.abspath(
@@ -51,8 +101,10 @@ class TestMergeMatchingHistoryChunksTestCase(unittest.TestCase):
 
         self.temp_dir = tempfile.mkdtemp()
         for fn, file_content in setup_content["inputs"].items():
+            # history files hold one JSON record per line
             with open(os.path.join(self.temp_dir, fn), "w+") as setup_outfile:
-                json.dump(file_content, setup_outfile)
+                for record in file_content.values():
+                    setup_outfile.write(json.dumps(record) + "\n")
 
         self.dest_fp = os.path.join(self.temp_dir, "dest.json")
         self.src_fps = [os.path.join(self.temp_dir, f"src{i}.json") for i in range(1, 3)]
@@ -68,13 +120,17 @@ class TestMergeMatchingHistoryChunksTestCase(unittest.TestCase):
         for fn, content in self.expected_outputs.items():
             fp = os.path.join(self.temp_dir, fn)
             with open(fp, "r") as result_infile:
-                content = json.load(result_infile)
+                content = {record["lidvid"]: record for record in map(json.loads, result_infile)}
                 self.assertDictEqual(self.expected_outputs[fn], content)
                 print(fp)
                 print(content)
                 print(self.expected_outputs[fn])
                 print("\n")
 
+    def test_leaves_no_remainder_files(self):
+        merge_matching_history_chunks(self.dest_fp, self.src_fps)
+        self.assertSetEqual(set(self.expected_outputs.keys()), set(os.listdir(self.temp_dir)))
+
 
 if __name__ == "__main__":
     unittest.main()
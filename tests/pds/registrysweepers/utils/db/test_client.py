@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime
+
+from opensearchpy.exceptions import SerializationError
+from pds.registrysweepers.utils.db.client import get_opensearch_client
+from pds.registrysweepers.utils.db.client import OrjsonSerializer
+
+
+class OrjsonSerializerTestCase(unittest.TestCase):
+    serializer = OrjsonSerializer()
+
+    def test_round_trip(self):
+        data = {"lidvid": "a:b:c:d::1.0", "product_lidvid": ["a:b:c:d:e:f::1.0"], "count": 1}
+        self.assertDictEqual(data, self.serializer.loads(self.serializer.dumps(data)))
+
+    def test_string_passthrough(self):
+        bulk_body = '{"update":{"_id":"a:b:c:d::1.0"}}\n'
+        self.assertIs(bulk_body, self.serializer.dumps(bulk_body))
+        encoded_bulk_body = bulk_body.encode("utf-8")
+        self.assertIs(encoded_bulk_body, self.serializer.dumps(encoded_bulk_body))
+
+    def test_datetime_serialization(self):
+        self.assertEqual('{"date":"1950-01-01T00:00:00"}', self.serializer.dumps({"date": datetime(1950, 1, 1)}))
+
+    def test_invalid_input(self):
+        with self.assertRaises(SerializationError):
+            self.serializer.loads("{not json")
+
+
+class GetOpensearchClientTestCase(unittest.TestCase):
+    def test_connection_pooling_and_compression(self):
+        client = get_opensearch_client("https://localhost:9200", "user", "pass", pool_maxsize=48)
+        connection = client.transport.get_connection()
+        self.assertEqual(48, connection.pool.pool.maxsize)
+        self.assertTrue(connection.http_compress)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+import json
+import unittest
+from typing import Dict
+from typing import List
+
+from pds.registrysweepers.utils.db import aggregate_update_error_types
+from pds.registrysweepers.utils.db import query_registry_db_with_scroll
+from pds.registrysweepers.utils.db import query_registry_db_with_search_after
+from pds.registrysweepers.utils.db import query_registry_db_with_sliced_scroll
+from pds.registrysweepers.utils.db import Update
+from pds.registrysweepers.utils.db import update_as_statements
+from pds.registrysweepers.utils.db import write_updated_docs
+
+
+class BulkRecordingClientMock:
+    """Minimal stand-in for OpenSearch, recording the bodies of bulk requests it receives"""
+
+    def __init__(self):
+        self.bulk_bodies: List[str] = []
+
+    def bulk(self, index: str, body: bytes, request_timeout: int) -> Dict:
+        self.bulk_bodies.append(body.decode("utf-8"))
+        return {"errors": False, "items": []}
+
+
+class SearchAfterClientMock:
+    """
+    Minimal stand-in for OpenSearch, serving pages of a sorted collection of documents via search_after.  Like a real
+    response filtered by filter_path, empty branches are omitted - hits.total is absent unless tracked, hits.hits is
+    absent from an empty page, and an empty untracked page is returned as {}.
+    """
+
+    def __init__(self, lidvids: List[str]):
+        self.docs = [{"_id": lidvid, "_source": {"lidvid": lidvid}} for lidvid in sorted(lidvids)]
+        self.search_kwargs: List[Dict] = []
+
+    def search(self, index: str, body: Dict, size: int, track_total_hits: bool, **kwargs) -> Dict:
+        self.search_kwargs.append({"track_total_hits": track_total_hits, "size": size})
+        search_after = body.get("search_after")
+        matching_docs = [d for d in self.docs if search_after is None or d["_source"]["lidvid"] > search_after[0]]
+        hits: Dict = {}
+        if len(matching_docs) > 0:
+            hits["hits"] = matching_docs[:size]
+        if track_total_hits:
+            hits["total"] = {"value": len(self.docs)}
+        return {"hits": hits} if len(hits) > 0 else {}
+
+
+class QueryRegistryDbWithSearchAfterTestCase(unittest.TestCase):
+    def test_all_hits_are_served(self):
+        for doc_count in [0, 1, 4, 5]:
+            lidvids = [f"a:b:c:d::{i}.0" for i in range(doc_count)]
+            client = SearchAfterClientMock(lidvids)
+
+            hits = list(query_registry_db_with_search_after(client, "registry", {}, {}, page_size=2))  # type: ignore
+
+            self.assertListEqual(sorted(lidvids), [hit["_id"] for hit in hits])
+            self.assertTrue(client.search_kwargs[0]["track_total_hits"], "total hits are tracked for first page")
+            self.assertFalse(any(kwargs["track_total_hits"] for kwargs in client.search_kwargs[1:]))
+
+    def test_exact_multiple_of_page_size(self):
+        lidvids = [f"a:b:c:d::{i}.0" for i in range(4)]
+        client = SearchAfterClientMock(lidvids)
+
+        hits = list(query_registry_db_with_search_after(client, "registry", {}, {}, page_size=2))  # type: ignore
+
+        self.assertListEqual(lidvids, [hit["_id"] for hit in hits])
+        self.assertEqual(3, len(client.search_kwargs), "the empty final page is requested, and ends paging")
+
+    def test_result_set_shrinks_during_paging(self):
+        lidvids = [f"a:b:c:d::{i}.0" for i in range(5)]
+        client = SearchAfterClientMock(lidvids)
+
+        hits = query_registry_db_with_search_after(client, "registry", {}, {}, page_size=2)  # type: ignore
+        served_ids = [next(hits)["_id"]]
+        # the last document drops out of the result set (e.g. is updated by the caller) after the total is counted
+        client.docs.pop()
+        served_ids.extend(hit["_id"] for hit in hits)
+
+        self.assertListEqual(lidvids[:4], served_ids)
+
+    def test_query_is_not_mutated(self):
+        client = SearchAfterClientMock([f"a:b:c:d::{i}.0" for i in range(5)])
+        query: Dict = {"query": {"match_all": {}}}
+
+        hits = list(query_registry_db_with_search_after(client, "registry", query, {}, page_size=2))  # type: ignore
+
+        self.assertEqual(5, len(hits))
+        self.assertDictEqual({"query": {"match_all": {}}}, query)
+
+
+class ScrollClientMock:
+    """Minimal stand-in for OpenSearch, serving a collection of documents via the scroll API and recording clears"""
+
+    def __init__(self, doc_count: int):
+        self.docs = [{"_id": str(i), "_source": {}} for i in range(doc_count)]
+        self.served_count = 0
+        self.page_size = 0
+        self.cleared_scroll_ids: List[str] = []
+
+    def _serve_page(self) -> Dict:
+        page = self.docs[self.served_count : self.served_count + self.page_size]
+        self.served_count += len(page)
+        return {"_scroll_id": "scroll", "hits": {"total": {"value": len(self.docs)}, "hits": page}}
+
+    def search(self, index: str, body: Dict, size: int, **kwargs) -> Dict:
+        self.page_size = size
+        return self._serve_page()
+
+    def scroll(self, scroll_id: str, **kwargs) -> Dict:
+        return self._serve_page()
+
+    def clear_scroll(self, scroll_id: str):
+        self.cleared_scroll_ids.append(scroll_id)
+
+
+class QueryRegistryDbWithScrollTestCase(unittest.TestCase):
+    def test_all_hits_are_served(self):
+        client = ScrollClientMock(doc_count=5)
+        hits = list(query_registry_db_with_scroll(client, "registry", {}, {}, page_size=2))  # type: ignore
+        self.assertListEqual([d["_id"] for d in client.docs], [hit["_id"] for hit in hits])
+        self.assertListEqual(["scroll"], client.cleared_scroll_ids)
+
+    def test_scroll_is_cleared_when_consumer_stops_early(self):
+        client = ScrollClientMock(doc_count=5)
+        hits = iter(query_registry_db_with_scroll(client, "registry", {}, {}, page_size=2))  # type: ignore
+        next(hits)
+        hits.close()  # type: ignore
+        self.assertListEqual(["scroll"], client.cleared_scroll_ids)
+
+
+class SlicedScrollClientMock:
+    """Minimal stand-in for OpenSearch, serving slices of a collection of documents via the scroll API"""
+
+    def __init__(self, doc_count: int):
+        self.docs = [{"_id": str(i), "_source": {}} for i in range(doc_count)]
+        self.scrolls: Dict[str, List[Dict]] = {}
+        self.totals: Dict[str, int] = {}
+        self.page_size = 0
+
+    def _serve_page(self, scroll_id: str, size: int) -> Dict:
+        remaining_docs = self.scrolls[scroll_id]
+        page, self.scrolls[scroll_id] = remaining_docs[:size], remaining_docs[size:]
+        return {"_scroll_id": scroll_id, "hits": {"total": {"value": self.totals[scroll_id]}, "hits": page}}
+
+    def search(self, index: str, body: Dict, size: int, **kwargs) -> Dict:
+        slice_id, slices = body["slice"]["id"], body["slice"]["max"]
+        scroll_id = f"slice-{slice_id}"
+        slice_docs = [d for i, d in enumerate(self.docs) if i % slices == slice_id]
+        self.scrolls[scroll_id] = slice_docs
+        self.totals[scroll_id] = len(slice_docs)
+        self.page_size = size
+        return self._serve_page(scroll_id, size)
+
+    def scroll(self, scroll_id: str, **kwargs) -> Dict:
+        return self._serve_page(scroll_id, self.page_size)
+
+    def clear_scroll(self, scroll_id: str):
+        pass
+
+
+class QueryRegistryDbWithSlicedScrollTestCase(unittest.TestCase):
+    def test_all_hits_are_served(self):
+        client = SlicedScrollClientMock(doc_count=25)
+        hits = list(
+            query_registry_db_with_sliced_scroll(client, "registry-refs", {}, {}, slices=3, page_size=4)  # type: ignore
+        )
+        self.assertListEqual(sorted(d["_id"] for d in client.docs), sorted(hit["_id"] for hit in hits))
+
+    def test_invalid_slice_count(self):
+        with self.assertRaises(ValueError):
+            list(query_registry_db_with_sliced_scroll(None, "registry-refs", {}, {}, slices=0))  # type: ignore
+
+
+class WriteUpdatedDocsTestCase(unittest.TestCase):
+    def test_chunks_are_written_in_order(self):
+        client = BulkRecordingClientMock()
+        updates = [Update(id=f"a:b:c:d::{i}.0", content={"key": i}) for i in range(5)]
+
+        write_updated_docs(client, updates, index_name="registry", bulk_chunk_max_update_count=2)  # type: ignore
+
+        self.assertEqual(3, len(client.bulk_bodies))
+        written_ids = [
+            json.loads(line)["update"]["_id"]
+            for body in client.bulk_bodies
+            for line in body.splitlines()
+            if line.startswith('{"update"')
+        ]
+        self.assertListEqual([u.id for u in updates], written_ids)
+
+    def test_empty_input(self):
+        client = BulkRecordingClientMock()
+        write_updated_docs(client, [], index_name="registry")  # type: ignore
+        self.assertListEqual([], client.bulk_bodies)
+
+
+class UpdateAsStatementsTestCase(unittest.TestCase):
+    def test_statements(self):
+        update = Update(id="a:b:c:d::1.0", content={"ops:Provenance/ops:parent_bundle_identifier": ["a:b:c::1.0"]})
+        metadata_statement, content_statement = update_as_statements(update)
+        self.assertDictEqual({"update": {"_id": "a:b:c:d::1.0"}}, json.loads(metadata_statement))
+        self.assertDictEqual({"doc": update.content}, json.loads(content_statement))
+
+    def test_statements_with_versioning_information(self):
+        update = Update(id='a:b:c:"d"::1.0', content={}, primary_term=3, seq_no=42)
+        metadata_statement, _ = update_as_statements(update)
+        self.assertDictEqual(
+            {"update": {"_id": 'a:b:c:"d"::1.0'}, "if_primary_term": 3, "if_seq_no": 42}, json.loads(metadata_statement)
+        )
+
+    def test_flat_content_serialization_distinguishes_equal_values_of_different_types(self):
+        for content in [{"key": 1}, {"key": True}, {"key": 1.0}, {"key": "1"}, {"key": 1}]:
+            _, content_statement = update_as_statements(Update(id="a:b:c:d::1.0", content=content))
+            self.assertEqual({"doc": content}, json.loads(content_statement))
+            self.assertIs(type(content["key"]), type(json.loads(content_statement)["doc"]["key"]))
+
+
+class AggregateUpdateErrorTypesTestCase(unittest.TestCase):
+    def test_aggregation(self):
+        def failed_item(id: str, error_type: str, reason: str) -> Dict:
+            return {"update": {"_id": id, "error": {"type": error_type, "reason": reason}}}
+
+        items = [
+            failed_item("a", "document_missing_exception", "missing"),
+            failed_item("b", "version_conflict_engine_exception", "conflict"),
+            failed_item("c", "document_missing_exception", "missing"),
+        ]
+
+        self.assertDictEqual(
+            {
+                "document_missing_exception": {"missing": ["a", "c"]},
+                "version_conflict_engine_exception": {"conflict": ["b"]},
+            },
+            aggregate_update_error_types(items),  # type: ignore
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
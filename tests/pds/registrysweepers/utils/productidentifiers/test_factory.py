@@ -22,11 +22,8 @@ class PdsProductIdentifierFactoryTestCase(unittest.TestCase):
             "urn:nasa:pds:epoxi::",
         ]
         for identifier in bad_strings:
-            try:
-                self.assertRaises(ValueError, lambda: PdsProductIdentifierFactory.from_string(identifier))
-            except AssertionError as err:
-                print(f'ValueError not raised when instantiating from "{identifier}"')
-                raise err
+            with self.assertRaises(ValueError, msg=f'ValueError not raised when instantiating from "{identifier}"'):
+                PdsProductIdentifierFactory.from_string(identifier)
 
 
 if __name__ == "__main__":
@@ -5,9 +5,12 @@ from pds.registrysweepers.utils.productidentifiers.pdslidvid import PdsLidVid
 
 class PdsLidVidTestCase(unittest.TestCase):
     def test_invalid_instantiation(self):
-        self.assertRaises(ValueError, lambda: PdsLidVid.from_string("some:lid:without:vid"))
-        self.assertRaises(ValueError, lambda: PdsLidVid.from_string("some:lid:with:no:vid::"))
-        self.assertRaises(ValueError, lambda: PdsLidVid.from_string("some:lid:with:bad:vid::1.2.3"))
+        with self.assertRaises(ValueError):
+            PdsLidVid.from_string("some:lid:without:vid")
+        with self.assertRaises(ValueError):
+            PdsLidVid.from_string("some:lid:with:no:vid::")
+        with self.assertRaises(ValueError):
+            PdsLidVid.from_string("some:lid:with:bad:vid::1.2.3")
 
     def test_equality(self):
         base = PdsLidVid.from_string("urn:nasa:pds:epoxi::1.0")
@@ -24,6 +27,11 @@ class PdsLidVidTestCase(unittest.TestCase):
         self.assertNotEqual(base, different_vid)
         self.assertNotEqual(base.__hash__(), different_vid.__hash__())
 
+    def test_string_form_is_canonical(self):
+        lidvid = PdsLidVid.from_string("urn:nasa:pds:epoxi::1.00")
+        self.assertEqual("urn:nasa:pds:epoxi::1.0", str(lidvid))
+        self.assertEqual(PdsLidVid.from_string("urn:nasa:pds:epoxi::1.0"), lidvid)
+
     def test_comparison(self):
         first = PdsLidVid.from_string("something::1.0")
         second = PdsLidVid.from_string("something::2.0")
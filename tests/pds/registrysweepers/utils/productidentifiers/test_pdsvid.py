@@ -9,9 +9,10 @@ class PdsVidTestCase(unittest.TestCase):
         return self.defaultTestResult()
 
     def test_invalid_instantiation(self):
-        bad_strings = {"1.-1", "1.0.0"}
+        bad_strings = ("1.-1", "1.0.0")
         for string in bad_strings:
-            self.assertRaises(ValueError, lambda: PdsVid.from_string(string))
+            with self.assertRaises(ValueError, msg=f'ValueError not raised when instantiating from "{string}"'):
+                PdsVid.from_string(string)
 
     def test_equality(self):
         base = PdsVid(1, 0)
@@ -2,6 +2,7 @@ import unittest
 
 from pds.registrysweepers.utils.misc import coerce_list_type
 from pds.registrysweepers.utils.misc import coerce_non_list_type
+from pds.registrysweepers.utils.misc import get_random_hex_id
 from pds.registrysweepers.utils.misc import iterate_pages_of_size
 
 
@@ -24,7 +25,16 @@ class IteratePagesOfTestCase(unittest.TestCase):
         self.assertEqual([], list(iterate_pages_of_size(1, [])))
 
     def test_invalid_page_size(self):
-        self.assertRaises(ValueError, lambda: list(iterate_pages_of_size(0, [1, 2, 3])))
+        with self.assertRaises(ValueError):
+            iterate_pages_of_size(0, [1, 2, 3])
+
+    def test_iterator_input_is_consumed_lazily(self):
+        page_size = 100
+        source = iter(range(10**6))
+        pages = iterate_pages_of_size(page_size, source)
+
+        self.assertListEqual(list(range(page_size)), next(pages))
+        self.assertEqual(page_size, next(source))
 
 
 class CoerceListTypeTestCase(unittest.TestCase):
@@ -62,5 +72,14 @@ class CoerceNonListTypeTestCase(unittest.TestCase):
         self.assertEqual(None, coerce_non_list_type(arr_null, support_null=True))
 
 
+class GetRandomHexIdTestCase(unittest.TestCase):
+    def test_ids_are_of_requested_length(self):
+        for id_len in [1, 6, 16]:
+            for _ in range(100):
+                id = get_random_hex_id(id_len)
+                self.assertEqual(id_len, len(id))
+                int(id, 16)
+
+
 if __name__ == "__main__":
     unittest.main()